@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def atribuicao_minima(custos):
+    # Problema de atribuição retangular (linhas <= colunas) de custo mínimo,
+    # pelo método húngaro com caminhos aumentantes mais curtos (variante de
+    # Jonker-Volgenant), com o laço interno vetorizado sobre as colunas.
+    # Custos np.inf marcam pares proibidos; cada linha precisa ter ao menos
+    # uma coluna finita alcançável. Devolve a coluna escolhida para cada linha.
+    custos = np.asarray(custos, dtype=np.float64)
+    num_linhas, num_colunas = custos.shape
+    if num_linhas > num_colunas:
+        raise ValueError("A matriz de custos deve ter no máximo tantas linhas quanto colunas")
+
+    # Índices 1..n / 1..m; a coluna 0 é a raiz de cada busca
+    u = np.zeros(num_linhas + 1)
+    v = np.zeros(num_colunas + 1)
+    linha_da_coluna = np.zeros(num_colunas + 1, dtype=np.intp)
+    anterior = np.zeros(num_colunas + 1, dtype=np.intp)
+
+    for linha in range(1, num_linhas + 1):
+        linha_da_coluna[0] = linha
+        coluna_atual = 0
+        distancia = np.full(num_colunas + 1, np.inf)
+        visitada = np.zeros(num_colunas + 1, dtype=bool)
+
+        while True:
+            visitada[coluna_atual] = True
+            origem = linha_da_coluna[coluna_atual]
+            abertas = ~visitada
+            abertas[0] = False
+
+            reduzido = custos[origem - 1] - u[origem] - v[1:]
+            melhora = abertas[1:] & (reduzido < distancia[1:])
+            distancia[1:][melhora] = reduzido[melhora]
+            anterior[1:][melhora] = coluna_atual
+
+            candidatas = np.where(abertas, distancia, np.inf)
+            proxima = int(np.argmin(candidatas))
+            delta = candidatas[proxima]
+            if not np.isfinite(delta):
+                raise ValueError(f"Linha {linha - 1} sem coluna viável")
+
+            visitadas = np.flatnonzero(visitada)
+            u[linha_da_coluna[visitadas]] += delta
+            v[visitadas] -= delta
+            distancia[abertas] -= delta
+
+            coluna_atual = proxima
+            if linha_da_coluna[coluna_atual] == 0:
+                break
+
+        # Inverte o caminho aumentante
+        while coluna_atual:
+            coluna_anterior = anterior[coluna_atual]
+            linha_da_coluna[coluna_atual] = linha_da_coluna[coluna_anterior]
+            coluna_atual = coluna_anterior
+
+    coluna_da_linha = np.full(num_linhas, -1, dtype=np.intp)
+    colunas = np.flatnonzero(linha_da_coluna[1:])
+    coluna_da_linha[linha_da_coluna[colunas + 1] - 1] = colunas
+    return coluna_da_linha
@@ -0,0 +1,202 @@
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from AGSelecao import OPERADORES_SELECAO
+from AGTurmas import AlocacaoTurmasAG, gerar_instancia_sintetica
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Cada preset define a instância sintética e os parâmetros do AG
+PRESETS = {
+    'pequeno': {
+        'instancia': {'num_salas': 20, 'num_turmas': 400, 'num_blocos': 5},
+        'parametros': {'tamanho_populacao': 30, 'num_geracoes': 30}
+    },
+    'medio': {
+        'instancia': {'num_salas': 58, 'num_turmas': 1348, 'num_blocos': 11},
+        'parametros': {'tamanho_populacao': 100, 'num_geracoes': 50}
+    },
+    'grande': {
+        'instancia': {'num_salas': 300, 'num_turmas': 7000, 'num_blocos': 30},
+        'parametros': {'tamanho_populacao': 50, 'num_geracoes': 20}
+    },
+    'xl': {
+        'instancia': {'num_salas': 2100, 'num_turmas': 50000, 'num_blocos': 60},
+        'parametros': {'tamanho_populacao': 20, 'num_geracoes': 5}
+    }
+}
+
+PARAMETROS_BASE = {
+    'novos_individuos_por_geracao': 3,
+    'taxa_crossover': 150,
+    'periodos_sem_evolucao': 9
+}
+
+# Métricas comparadas entre execuções: True quando maior é melhor
+METRICAS_COMPARADAS = {
+    'geracoes_por_segundo': True,
+    'avaliacoes_por_segundo': True,
+    'fitness_por_segundo': True,
+    'tempo_inicializacao': False,
+    'pico_memoria_mb': False,
+    'fitness_final': False
+}
+
+
+def _pico_memoria_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def executar_preset(nome, semente=27, parametros_extras=None):
+    preset = PRESETS[nome]
+    parametros = dict(PARAMETROS_BASE, **preset['parametros'])
+    parametros.update(parametros_extras or {})
+
+    inicio = time.perf_counter()
+    turmas, salas, blocos = gerar_instancia_sintetica(semente=semente, **preset['instancia'])
+    ag = AlocacaoTurmasAG(turmas, salas, blocos, parametros)
+    tempo_carga = time.perf_counter() - inicio
+
+    random.seed(semente)
+    pool = ag.criar_pool()
+    try:
+        inicio = time.perf_counter()
+        ag.inicializar_populacao(pool)
+        melhor = ag.calcular_fitness(ag._melhor_individuo())['fitness_total']
+        tempo_inicializacao = time.perf_counter() - inicio
+
+        # Curva (tempo, melhor fitness) a cada geração
+        curva = [(0.0, melhor)]
+        inicio = time.perf_counter()
+        for _ in range(parametros['num_geracoes']):
+            ag.executar_geracao(pool)
+            melhor = ag.calcular_fitness(ag._melhor_individuo())['fitness_total']
+            curva.append((time.perf_counter() - inicio, melhor))
+        tempo_geracoes = time.perf_counter() - inicio
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # Cada filho gerado é avaliado uma vez
+    avaliacoes = parametros['num_geracoes'] * parametros['novos_individuos_por_geracao']
+    return {
+        'instancia': dict(preset['instancia'], elementos_turma=len(ag.elementos_turma),
+                          elementos_sala=len(ag.elementos_sala_por_indice)),
+        'parametros': parametros,
+        'semente': semente,
+        'tempo_carga': tempo_carga,
+        'tempo_inicializacao': tempo_inicializacao,
+        'tempo_geracoes': tempo_geracoes,
+        'geracoes_por_segundo': parametros['num_geracoes'] / tempo_geracoes if tempo_geracoes else None,
+        'avaliacoes_por_segundo': avaliacoes / tempo_geracoes if tempo_geracoes else None,
+        # Redução do melhor fitness por segundo de evolução
+        'fitness_por_segundo': (curva[0][1] - curva[-1][1]) / tempo_geracoes if tempo_geracoes else None,
+        'pico_memoria_mb': _pico_memoria_mb(),
+        'fitness_inicial': curva[0][1],
+        'fitness_final': curva[-1][1],
+        'curva_fitness': curva,
+        'cache_fitness': ag.fitness_cache.estatisticas()
+    }
+
+
+def executar_benchmark(presets, semente=27, parametros_extras=None, selecoes=('elitista',)):
+    # Cada preset roda num processo novo, para que o pico de memória seja só
+    # dele. Com mais de um operador de seleção, cada combinação vira uma
+    # entrada 'preset:selecao'
+    contexto = multiprocessing.get_context('spawn')
+    resultados = {}
+    for nome_preset in presets:
+        if nome_preset not in PRESETS:
+            raise ValueError(f"Preset desconhecido: {nome_preset} (use {', '.join(PRESETS)})")
+        for selecao in selecoes:
+            if selecao != 'elitista' and selecao not in OPERADORES_SELECAO:
+                raise ValueError(f"Operador de seleção desconhecido: {selecao}")
+            nome = nome_preset if list(selecoes) == ['elitista'] else f"{nome_preset}:{selecao}"
+            extras = dict(parametros_extras or {}, selecao=selecao)
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=contexto) as executor:
+                resultados[nome] = executor.submit(
+                    executar_preset, nome_preset, semente, extras).result()
+            print(f"{nome}: {resultados[nome]['geracoes_por_segundo']:.2f} gerações/s, "
+                  f"{resultados[nome]['avaliacoes_por_segundo']:.2f} avaliações/s, "
+                  f"{resultados[nome]['fitness_por_segundo']:.1f} fitness/s, "
+                  f"inicialização {resultados[nome]['tempo_inicializacao']:.2f} s, "
+                  f"fitness final {resultados[nome]['fitness_final']:.2f}")
+
+    return {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': multiprocessing.cpu_count(),
+        'resultados': resultados
+    }
+
+
+def comparar(atual, referencia, tolerancia=0.1):
+    # Devolve as regressões: métricas que pioraram mais que a tolerância
+    # relativa em relação à referência
+    regressoes = []
+    for nome, resultado in atual['resultados'].items():
+        base = referencia['resultados'].get(nome)
+        if base is None:
+            continue
+        for metrica, maior_melhor in METRICAS_COMPARADAS.items():
+            valor, valor_base = resultado.get(metrica), base.get(metrica)
+            if valor is None or not valor_base:
+                continue
+            razao = valor / valor_base
+            piorou = razao < 1 - tolerancia if maior_melhor else razao > 1 + tolerancia
+            print(f"{nome}.{metrica}: {valor_base:.4g} -> {valor:.4g} ({razao:.2f}x)"
+                  f"{' REGRESSÃO' if piorou else ''}")
+            if piorou:
+                regressoes.append((nome, metrica, valor_base, valor))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do AG de alocação de turmas")
+    parser.add_argument('--presets', nargs='+', default=['pequeno', 'medio'],
+                        choices=list(PRESETS))
+    parser.add_argument('--semente', type=int, default=27)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--selecao', nargs='+', default=['elitista'],
+                        choices=['elitista'] + list(OPERADORES_SELECAO),
+                        help="operadores de seleção comparados")
+    parser.add_argument('--saida', help="arquivo JSON com os resultados")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--tolerancia', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    resultados = executar_benchmark(args.presets, args.semente, {'workers': args.workers},
+                                    args.selecao)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            referencia = json.load(arquivo)
+        if comparar(resultados, referencia, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+
+from AGTurmas import AlocacaoTurmasAG
+from AGValidacao import validar_bloco, validar_sala, validar_turma
+
+
+CAMPOS_SOLUCAO = ['id_elemento', 'id_turma', 'horario', 'num_alunos',
+                  'id_sala', 'capacidade', 'bloco']
+
+
+def _formato(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extensao == '.csv':
+        return 'csv'
+    raise ValueError(f"Formato não suportado (use .jsonl ou .csv): {caminho}")
+
+
+def ler_registros(caminho):
+    # Gera (linha, registro) um a um, sem carregar o arquivo inteiro
+    if _formato(caminho) == 'jsonl':
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha, texto in enumerate(arquivo, 1):
+                if not texto.strip():
+                    continue
+                try:
+                    yield linha, json.loads(texto)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{caminho}:{linha}: JSON inválido: {e}") from None
+    else:
+        with open(caminho, encoding='utf-8', newline='') as arquivo:
+            leitor = csv.DictReader(arquivo)
+            for registro in leitor:
+                yield leitor.line_num, registro
+
+
+def ler_turmas(caminho):
+    # Valida cada turma à medida que é lida, como verificar_dados
+    ids = set()
+    for linha, registro in ler_registros(caminho):
+        origem = f"{caminho}:{linha}"
+        turma = validar_turma(registro, origem)
+        turma['id'] = str(turma['id'])
+        if turma['id'] in ids:
+            raise ValueError(f"{origem}: ID de turma duplicado: {turma['id']}")
+        ids.add(turma['id'])
+        yield turma
+
+
+def ler_salas(caminho):
+    ids = set()
+    for linha, registro in ler_registros(caminho):
+        origem = f"{caminho}:{linha}"
+        sala = validar_sala(registro, origem)
+        sala['id'], sala['bloco'] = str(sala['id']), str(sala['bloco'])
+        if sala['id'] in ids:
+            raise ValueError(f"{origem}: ID de sala duplicado: {sala['id']}")
+        ids.add(sala['id'])
+        yield sala
+
+
+def ler_blocos(caminho):
+    blocos = {}
+    for linha, registro in ler_registros(caminho):
+        origem = f"{caminho}:{linha}"
+        bloco = validar_bloco(registro, origem)
+        id_bloco = str(bloco.pop('id'))
+        if id_bloco in blocos:
+            raise ValueError(f"{origem}: ID de bloco duplicado: {id_bloco}")
+        blocos[id_bloco] = bloco
+    return blocos
+
+
+def carregar_instancia(caminho_turmas, caminho_salas, caminho_blocos, parametros):
+    blocos = ler_blocos(caminho_blocos)
+    return AlocacaoTurmasAG(ler_turmas(caminho_turmas), ler_salas(caminho_salas),
+                            blocos, parametros)
+
+
+def escrever_solucao(ag, alocacao, caminho):
+    # Escreve uma linha por elemento de turma à medida que percorre a solução
+    formato = _formato(caminho)
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        if formato == 'csv':
+            escritor = csv.DictWriter(arquivo, fieldnames=CAMPOS_SOLUCAO)
+            escritor.writeheader()
+        for id_elemento in ag.ids_turma:
+            elemento = ag.elemento_turma_por_id[id_elemento]
+            id_sala_elemento = alocacao.get(id_elemento)
+            sala = (ag.elemento_sala_por_id[id_sala_elemento]
+                    if id_sala_elemento is not None else None)
+            linha = {
+                'id_elemento': id_elemento,
+                'id_turma': elemento['id_turma'],
+                'horario': elemento['horario'],
+                'num_alunos': elemento['num_alunos'],
+                'id_sala': sala['id_sala'] if sala else None,
+                'capacidade': sala['capacidade'] if sala else None,
+                'bloco': sala['bloco'] if sala else None
+            }
+            if formato == 'csv':
+                escritor.writerow(linha)
+            else:
+                arquivo.write(json.dumps(linha, ensure_ascii=False) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Alocação de turmas em salas com algoritmo genético")
+    parser.add_argument('--turmas', required=True, help="arquivo de turmas (.jsonl ou .csv)")
+    parser.add_argument('--salas', required=True, help="arquivo de salas (.jsonl ou .csv)")
+    parser.add_argument('--blocos', required=True, help="arquivo de blocos (.jsonl ou .csv)")
+    parser.add_argument('--saida', required=True, help="arquivo da solução (.jsonl ou .csv)")
+    parser.add_argument('--populacao', type=int, default=100)
+    parser.add_argument('--geracoes', type=int, default=200)
+    parser.add_argument('--novos-individuos', type=int, default=3)
+    parser.add_argument('--taxa-crossover', type=int, default=150)
+    parser.add_argument('--periodos-sem-evolucao', type=int, default=9)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--checkpoint', help="arquivo .npz de checkpoint")
+    parser.add_argument('--intervalo-checkpoint', type=int, default=10)
+    parser.add_argument('--retomar', help="checkpoint .npz a partir do qual retomar")
+    parser.add_argument('--tempo-limite', type=float, help="tempo máximo de execução, em segundos")
+    parser.add_argument('--fitness-alvo', type=float, help="para ao atingir este fitness")
+    parser.add_argument('--max-avaliacoes', type=int, help="número máximo de avaliações de fitness")
+    parser.add_argument('--geracoes-sem-melhora', type=int,
+                        help="para após este número de gerações sem melhora do melhor fitness")
+    parser.add_argument('--grafico', help="grava o gráfico da evolução (.png, .svg...)")
+    parser.add_argument('--historico', help="grava o histórico de fitness a cada geração (.csv ou .jsonl)")
+    args = parser.parse_args(argv)
+
+    try:
+        _formato(args.saida)
+    except ValueError as e:
+        parser.error(f"--saida: {e}")
+    if args.semente is not None:
+        random.seed(args.semente)
+
+    parametros = {
+        'tamanho_populacao': args.populacao,
+        'num_geracoes': args.geracoes,
+        'novos_individuos_por_geracao': args.novos_individuos,
+        'taxa_crossover': args.taxa_crossover,
+        'periodos_sem_evolucao': args.periodos_sem_evolucao,
+        'workers': args.workers,
+        'checkpoint': args.checkpoint,
+        'intervalo_checkpoint': args.intervalo_checkpoint,
+        'grafico': args.grafico,
+        'arquivo_historico': args.historico,
+        'tempo_limite': args.tempo_limite,
+        'fitness_alvo': args.fitness_alvo,
+        'max_avaliacoes': args.max_avaliacoes,
+        'geracoes_sem_melhora': args.geracoes_sem_melhora
+    }
+
+    try:
+        ag = carregar_instancia(args.turmas, args.salas, args.blocos, parametros)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao carregar a instância: {e}", file=sys.stderr)
+        return 1
+
+    melhor_indiv, _ = ag.executar(retomar_de=args.retomar)
+    escrever_solucao(ag, melhor_indiv, args.saida)
+    print(f"Solução gravada em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import concurrent.futures
+import random
+import time
+from collections import Counter, defaultdict
+
+from AGTurmas import AlocacaoTurmasAG, Individuo, SEM_SALA, SALA_LIVRE
+
+
+def _otimizar_horario(horario, turmas, salas, blocos, parametros, semente):
+    # AG completo restrito a um horário; devolve pares (elemento de turma,
+    # elemento de sala) com ids globais
+    random.seed(semente)
+    ag = AlocacaoTurmasAG(turmas, salas, blocos, parametros)
+    ag.inicializar_populacao()
+    for _ in range(parametros['num_geracoes']):
+        ag.executar_geracao()
+    melhor = ag._melhor_individuo()
+    return horario, [
+        (id_elemento, ag.elementos_sala_por_indice[indice]['id_elemento'])
+        for id_elemento, indice in zip(ag.ids_turma, melhor.genoma.tolist())
+        if indice != SEM_SALA
+    ]
+
+
+class SolverPorHorario:
+    # Conflitos de sala só existem dentro de um horário; o único acoplamento
+    # entre horários é o termo de salas distintas por turma. Cada horário é
+    # otimizado por um AG próprio (em paralelo com workers > 1) e uma passada
+    # de coordenação aproxima as salas dos horários de uma mesma turma
+    def __init__(self, turmas, salas, blocos, parametros):
+        self.parametros = parametros
+        self.ag = AlocacaoTurmasAG(turmas, salas, blocos, dict(parametros, workers=1))
+        self.parametros_horario = dict(
+            parametros, workers=1,
+            tamanho_populacao=parametros.get(
+                'populacao_por_horario', parametros['tamanho_populacao']),
+            num_geracoes=parametros.get('geracoes_por_horario', parametros['num_geracoes']))
+
+        self.subproblemas = self._montar_subproblemas()
+
+        # Salas de cada (horário, tipo, chave de sala distinta) para a
+        # coordenação; os tipos também validam a troca com o ocupante
+        self.horario_genes = [None] * self.ag.num_genes
+        self.tipo_genes = [None] * self.ag.num_genes
+        for elemento in self.ag.elementos_turma:
+            self.horario_genes[elemento['indice']] = elemento['horario']
+            self.tipo_genes[elemento['indice']] = elemento['tipo']
+        self.tipo_salas = [sala['tipo'] for sala in self.ag.elementos_sala_por_indice]
+        self.salas_por_horario_tipo_chave = defaultdict(list)
+        for sala in self.ag.elementos_sala_por_indice:
+            self.salas_por_horario_tipo_chave[
+                (sala['horario'], sala['tipo'], self.ag._chave_salas[sala['indice']])].append(
+                sala['indice'])
+
+    def _montar_subproblemas(self):
+        turmas_horario = defaultdict(list)
+        for turma in self.ag.turmas:
+            # Horários repetidos na turma continuam repetidos no subproblema
+            for horario, repeticoes in Counter(turma['horarios']).items():
+                turmas_horario[horario].append(dict(turma, horarios=[horario] * repeticoes))
+
+        salas_horario = defaultdict(list)
+        for sala in self.ag.salas:
+            for horario in dict.fromkeys(sala['horarios_disponiveis']):
+                salas_horario[horario].append(dict(sala, horarios_disponiveis=[horario]))
+
+        subproblemas = {}
+        for horario, turmas in turmas_horario.items():
+            salas = salas_horario.get(horario)
+            if not salas:
+                continue
+            # Turmas especiais sem sala especial no horário ficam sem alocação,
+            # como no AG completo (verificar_dados rejeitaria o subproblema)
+            if not any(s.get('tipo') == 'especial' for s in salas):
+                turmas = [t for t in turmas if t.get('tipo') != 'especial']
+            if turmas:
+                subproblemas[horario] = (turmas, salas)
+        return subproblemas
+
+    def resolver_horarios(self):
+        tarefas = [(horario, turmas, salas, self.ag.blocos, self.parametros_horario,
+                    random.getrandbits(63))
+                   for horario, (turmas, salas) in self.subproblemas.items()]
+
+        workers = self.parametros.get('workers', 1)
+        if workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                resultados = list(executor.map(_otimizar_horario, *zip(*tarefas)))
+        else:
+            resultados = [_otimizar_horario(*tarefa) for tarefa in tarefas]
+
+        individuo = Individuo(self.ag.novo_genoma(), ocupacao=self.ag.nova_ocupacao())
+        for _, pares in resultados:
+            for id_elemento, id_sala_elemento in pares:
+                self.ag.atribuir_sala(individuo, self.ag.indice_turma[id_elemento],
+                                      self.ag.indice_sala[id_sala_elemento])
+        return individuo
+
+    def _tentar_mover(self, individuo, gene, sala):
+        # Move o gene para a sala (trocando com o ocupante, se houver) e
+        # desfaz se o fitness incremental não melhorar
+        ag = self.ag
+        atual = int(individuo.genoma[gene])
+        ocupante = int(individuo.ocupacao[sala])
+        if (ocupante != SALA_LIVRE and atual != SEM_SALA and
+                self.tipo_genes[ocupante] != self.tipo_salas[atual]):
+            return False
+        antes = individuo.estado.fitness_total
+
+        ag.atribuir_sala(individuo, gene, sala)
+        if ocupante != SALA_LIVRE:
+            ag.atribuir_sala(individuo, ocupante, atual)
+        if antes - individuo.estado.fitness_total > 1e-9 * max(1.0, abs(antes)):
+            return True
+
+        if ocupante != SALA_LIVRE:
+            ag.atribuir_sala(individuo, ocupante, sala)
+        ag.atribuir_sala(individuo, gene, atual)
+        return False
+
+    def coordenar(self, individuo):
+        # Para cada turma com vários horários, tenta levar cada elemento para a
+        # mesma sala (chave de sala) usada pelos outros horários da turma
+        ag = self.ag
+        ag.avaliar_incremental(individuo)
+        genoma = individuo.genoma
+        movimentos = 0
+
+        for _ in range(self.parametros.get('rodadas_coordenacao', 3)):
+            melhorou = False
+            for grupo in ag.genes_por_turma_grupo:
+                genes = [gene for gene in grupo.tolist() if gene < ag.num_genes]
+                if len(genes) < 2:
+                    continue
+                for gene in genes:
+                    chave_atual = ag._chave_salas[genoma[gene]]
+                    chaves = {ag._chave_salas[genoma[outro]] for outro in genes
+                              if outro != gene and genoma[outro] != SEM_SALA}
+                    chaves.discard(chave_atual)
+                    for chave in chaves:
+                        salas = self.salas_por_horario_tipo_chave.get(
+                            (self.horario_genes[gene], self.tipo_genes[gene], chave), [])
+                        if any(self._tentar_mover(individuo, gene, sala) for sala in salas):
+                            movimentos += 1
+                            melhorou = True
+                            break
+            if not melhorou:
+                break
+        return movimentos
+
+    def executar(self):
+        inicio = time.time()
+        print(f"\nIniciando solver por horário: {len(self.subproblemas)} horários, "
+              f"{self.parametros_horario['tamanho_populacao']} indivíduos e "
+              f"{self.parametros_horario['num_geracoes']} gerações por horário")
+
+        melhor_individuo = self.resolver_horarios()
+        tempo_horarios = time.time() - inicio
+        fitness_horarios = self.ag.calcular_fitness(melhor_individuo)['fitness_total']
+
+        movimentos = self.coordenar(melhor_individuo)
+        resultado = dict(self.ag.calcular_fitness(melhor_individuo, use_cache=False),
+                         criterio_parada='num_geracoes')
+        tempo_total = time.time() - inicio
+
+        print("\n=== RESULTADOS FINAIS (POR HORÁRIO) ===")
+        print(f"Fitness após os horários: {fitness_horarios:.2f} ({tempo_horarios:.2f} s)")
+        print(f"Coordenação: {movimentos} movimentos")
+        print(f"Melhor fitness: {resultado['fitness_total']:.2f}")
+        print(f"Problemas de capacidade: {resultado['problemas_tamanho']}")
+        print(
+            f"Problemas de bloco preferencial: {resultado['problemas_bloco']}")
+        print(f"Tempo de execução: {tempo_total / 60:.2f} minutos")
+
+        return self.ag.decodificar_individuo(melhor_individuo), resultado
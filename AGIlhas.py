@@ -0,0 +1,161 @@
+import multiprocessing
+import queue
+import random
+import time
+
+import numpy as np
+
+from AGTurmas import AlocacaoTurmasAG
+
+
+TOPOLOGIAS = ('anel', 'completa')
+# Espera máxima pelos migrantes de uma geração; uma ilha que não os recebe
+# (origem encerrada) falha em vez de bloquear para sempre
+TEMPO_ESPERA_MIGRACAO = 600.0
+
+
+def _vizinhos(indice, num_ilhas, topologia):
+    if topologia == 'anel':
+        return [(indice + 1) % num_ilhas] if num_ilhas > 1 else []
+    return [i for i in range(num_ilhas) if i != indice]
+
+
+def _executar_ilha(indice, ag, semente, num_geracoes, intervalo, num_migrantes,
+                   topologia, tempo_espera, caixas, resultados):
+    try:
+        random.seed(semente)
+        num_ilhas = len(caixas)
+        destinos = _vizinhos(indice, num_ilhas, topologia)
+        num_origens = sum(indice in _vizinhos(i, num_ilhas, topologia)
+                          for i in range(num_ilhas))
+
+        ag.inicializar_populacao()
+        melhor = ag._melhor_individuo()
+        ag.melhor_fitness_historico = [ag.calcular_fitness(melhor)['fitness_total']]
+
+        for geracao in range(num_geracoes):
+            ag.executar_geracao()
+            melhor = ag._melhor_individuo()
+            ag.melhor_fitness_historico.append(
+                ag.calcular_fitness(melhor)['fitness_total'])
+
+            if (geracao + 1) % intervalo == 0 and geracao + 1 < num_geracoes:
+                fitness = ag.calcular_fitness_lote(ag.populacao)['fitness_total']
+                elite = [ag.populacao[i] for i in np.argsort(
+                    fitness, kind='stable')[:num_migrantes]]
+                dados = ag.serializar_individuos(elite)
+                for destino in destinos:
+                    caixas[destino].put((geracao, indice, dados))
+
+                # Migração síncrona: espera os migrantes de todas as origens
+                # desta geração e os integra em ordem de ilha de origem
+                try:
+                    recebidos = sorted(caixas[indice].get(timeout=tempo_espera)
+                                       for _ in range(num_origens))
+                except queue.Empty:
+                    raise RuntimeError(
+                        f"migrantes da geração {geracao} não recebidos em {tempo_espera:.0f} s")
+                for _, _, dados_origem in recebidos:
+                    for migrante in ag.desserializar_individuos(dados_origem):
+                        ag.substituir_pior_individuo(migrante)
+
+        melhor = ag._melhor_individuo()
+        resultados.put((indice, None, melhor.genoma.tobytes(),
+                        ag.melhor_fitness_historico))
+    except Exception as e:
+        resultados.put((indice, f"{type(e).__name__}: {e}", None, None))
+
+
+class ModeloIlhas:
+    def __init__(self, turmas, salas, blocos, parametros):
+        self.parametros = parametros
+        self.num_ilhas = parametros.get('num_ilhas', multiprocessing.cpu_count())
+        self.intervalo_migracao = parametros.get('intervalo_migracao', 10)
+        self.num_migrantes = parametros.get('num_migrantes', 2)
+        self.topologia = parametros.get('topologia', 'anel')
+        self.tempo_espera_migracao = parametros.get('tempo_espera_migracao', TEMPO_ESPERA_MIGRACAO)
+
+        if self.topologia not in TOPOLOGIAS:
+            raise ValueError(f"Topologia desconhecida: {self.topologia}")
+        if self.num_ilhas < 1 or self.intervalo_migracao < 1:
+            raise ValueError(
+                "num_ilhas e intervalo_migracao devem ser positivos")
+
+        # O pré-processamento é feito uma vez e copiado para cada ilha
+        self.ag = AlocacaoTurmasAG(
+            turmas, salas, blocos, dict(parametros, workers=1))
+        self.historicos_ilhas = []
+        self.melhor_fitness_historico = []
+
+    def executar(self):
+        contexto = multiprocessing.get_context()
+        caixas = [contexto.Queue() for _ in range(self.num_ilhas)]
+        resultados = contexto.Queue()
+
+        print(f"\nIniciando modelo de ilhas: {self.num_ilhas} ilhas, "
+              f"topologia {self.topologia}, migração de {self.num_migrantes} "
+              f"indivíduos a cada {self.intervalo_migracao} gerações")
+
+        inicio = time.time()
+        processos = []
+        for indice in range(self.num_ilhas):
+            processo = contexto.Process(target=_executar_ilha, args=(
+                indice, self.ag._copia_estatica(), random.getrandbits(63),
+                self.parametros['num_geracoes'], self.intervalo_migracao,
+                self.num_migrantes, self.topologia, self.tempo_espera_migracao, caixas, resultados))
+            processo.start()
+            processos.append(processo)
+
+        por_ilha = {}
+        erros = []
+        try:
+            while len(por_ilha) + len(erros) < self.num_ilhas:
+                try:
+                    indice, erro, genoma, historico = resultados.get(timeout=1)
+                except queue.Empty:
+                    # Uma ilha encerrada de forma anormal (sinal, os._exit)
+                    # deixaria as vizinhas esperando seus migrantes
+                    encerradas = [f"ilha {i} encerrada com código {p.exitcode}"
+                                  for i, p in enumerate(processos) if p.exitcode not in (None, 0)]
+                    if encerradas:
+                        erros.extend(encerradas)
+                        break
+                    if not any(p.is_alive() for p in processos):
+                        erros.append("ilha encerrada sem resultado")
+                        break
+                    continue
+                if erro:
+                    erros.append(f"ilha {indice}: {erro}")
+                    break
+                por_ilha[indice] = (genoma, historico)
+        finally:
+            if erros:
+                for processo in processos:
+                    processo.terminate()
+            for processo in processos:
+                processo.join()
+
+        if erros:
+            raise RuntimeError(f"Falha no modelo de ilhas: {'; '.join(erros)}")
+
+        self.historicos_ilhas = [por_ilha[i][1] for i in range(self.num_ilhas)]
+        self.melhor_fitness_historico = [
+            min(valores) for valores in zip(*self.historicos_ilhas)]
+
+        candidatos = self.ag.desserializar_individuos(
+            b''.join(por_ilha[i][0] for i in range(self.num_ilhas)))
+        fitness = self.ag.calcular_fitness_lote(candidatos)['fitness_total']
+        melhor_individuo = candidatos[int(np.argmin(fitness))]
+        resultado = self.ag.calcular_fitness(melhor_individuo)
+
+        tempo_total = (time.time() - inicio) / 60
+        print("\n=== RESULTADOS FINAIS (ILHAS) ===")
+        for indice, historico in enumerate(self.historicos_ilhas):
+            print(f"Ilha {indice}: melhor fitness {historico[-1]:.2f}")
+        print(f"Melhor fitness: {resultado['fitness_total']:.2f}")
+        print(f"Problemas de capacidade: {resultado['problemas_tamanho']}")
+        print(
+            f"Problemas de bloco preferencial: {resultado['problemas_bloco']}")
+        print(f"Tempo de execução: {tempo_total:.2f} minutos")
+
+        return self.ag.decodificar_individuo(melhor_individuo), resultado
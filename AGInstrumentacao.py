@@ -0,0 +1,141 @@
+import csv
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+# Métodos de AlocacaoTurmasAG medidos (tempo inclusivo: mutacao inclui os
+# critérios, substituir_pior_individuo inclui calcular_fitness_lote etc.)
+FASES = ('selecionar_pais', 'selecionar_pares', 'crossover', 'mutacao',
+         'avaliar_incremental', 'calcular_fitness', 'calcular_fitness_lote',
+         'substituir_pior_individuo', 'atualizar_taxa_evolucao', '_gerar_filhos_paralelo',
+         'busca_local')
+CRITERIOS_MUTACAO = ('_mutacao_criterio_1', '_mutacao_criterio_2', '_mutacao_criterio_3',
+                     '_mutacao_criterio_4', '_mutacao_criterio_5')
+EVENTOS = ('geracao', 'novo_melhor')
+
+# Nome de cada método nas métricas, sem o prefixo de método interno
+NOMES_METRICAS = {nome: nome.lstrip('_') for nome in FASES + CRITERIOS_MUTACAO}
+
+
+class Instrumentacao:
+    # Mede as fases do AG substituindo os métodos da instância por versões
+    # cronometradas; sem instrumentação nenhum método é tocado, então o custo
+    # quando desativada é nulo
+    def __init__(self):
+        self.tempos = defaultdict(float)
+        self.chamadas = defaultdict(int)
+        self.callbacks = {evento: [] for evento in EVENTOS}
+        self.geracoes = []
+        self.melhor_fitness = None
+        self.instancia = None
+
+    def _medir(self, nome, metodo):
+        tempos = self.tempos
+        chamadas = self.chamadas
+        relogio = time.perf_counter
+
+        def medido(*args, **kwargs):
+            inicio = relogio()
+            try:
+                return metodo(*args, **kwargs)
+            finally:
+                tempos[nome] += relogio() - inicio
+                chamadas[nome] += 1
+        return medido
+
+    def instalar(self, ag):
+        for metodo, nome in NOMES_METRICAS.items():
+            setattr(ag, metodo, self._medir(nome, getattr(ag, metodo)))
+        self.instancia = ag
+
+    def remover(self, ag):
+        for metodo in NOMES_METRICAS:
+            ag.__dict__.pop(metodo, None)
+
+    def acumular(self, tempos, chamadas):
+        # Soma as medições feitas nos workers do pool de filhos; os tempos de
+        # workers simultâneos se somam e podem passar do tempo da geração
+        for nome, tempo in tempos.items():
+            self.tempos[nome] += tempo
+        for nome, quantidade in chamadas.items():
+            self.chamadas[nome] += quantidade
+
+    def registrar_callback(self, evento, funcao):
+        if evento not in self.callbacks:
+            raise ValueError(f"Evento desconhecido: {evento} (use {', '.join(EVENTOS)})")
+        self.callbacks[evento].append(funcao)
+
+    def iniciar(self, ag):
+        self.geracoes = []
+        self.melhor_fitness = None
+        self._marcar(ag)
+
+    def _marcar(self, ag):
+        self._inicio_geracao = time.perf_counter()
+        self._tempos_anteriores = dict(self.tempos)
+        self._chamadas_anteriores = dict(self.chamadas)
+        cache = ag.fitness_cache
+        self._cache_anterior = (cache.acertos, cache.falhas)
+
+    def diversidade(self, ag, melhor_individuo):
+        # Fração média de genes em que cada indivíduo difere do melhor e número
+        # de genomas distintos (pelo hash Zobrist)
+        if not ag.populacao:
+            return 0.0, 0
+        genomas = np.stack([ind.genoma for ind in ag.populacao])
+        diferenca = float(np.mean(genomas != melhor_individuo.genoma)) if ag.num_genes else 0.0
+        return diferenca, len({ag.hash_individuo(ind) for ind in ag.populacao})
+
+    def fim_geracao(self, ag, geracao, melhor_individuo, melhor_fitness):
+        agora = time.perf_counter()
+        cache = ag.fitness_cache
+        acertos = cache.acertos - self._cache_anterior[0]
+        falhas = cache.falhas - self._cache_anterior[1]
+        diversidade, distintos = self.diversidade(ag, melhor_individuo)
+
+        metricas = {
+            'geracao': geracao,
+            'melhor_fitness': melhor_fitness,
+            'tempo_geracao': agora - self._inicio_geracao,
+            'cache_acertos': acertos,
+            'cache_falhas': falhas,
+            'cache_taxa_acerto': acertos / (acertos + falhas) if acertos + falhas else 0.0,
+            'diversidade': diversidade,
+            'individuos_distintos': distintos,
+            'taxa_evolucao': ag.taxa_evolucao,
+            'limite_insercao': ag.limite_insercao
+        }
+        for nome in NOMES_METRICAS.values():
+            metricas[f'tempo_{nome}'] = self.tempos[nome] - self._tempos_anteriores.get(nome, 0.0)
+            metricas[f'chamadas_{nome}'] = self.chamadas[nome] - self._chamadas_anteriores.get(nome, 0)
+        self.geracoes.append(metricas)
+
+        for funcao in self.callbacks['geracao']:
+            funcao(ag, metricas)
+        if self.melhor_fitness is None or melhor_fitness < self.melhor_fitness:
+            self.melhor_fitness = melhor_fitness
+            for funcao in self.callbacks['novo_melhor']:
+                funcao(ag, metricas)
+
+        self._marcar(ag)
+        return metricas
+
+    def resumo(self):
+        return {nome: {'tempo': self.tempos[nome], 'chamadas': self.chamadas[nome]}
+                for nome in NOMES_METRICAS.values()}
+
+    def exportar_json(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump({'geracoes': self.geracoes, 'totais': self.resumo()},
+                      arquivo, ensure_ascii=False, indent=2)
+
+    def exportar_csv(self, caminho):
+        if not self.geracoes:
+            raise ValueError("Nenhuma geração registrada para exportar")
+        with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=list(self.geracoes[0]))
+            escritor.writeheader()
+            escritor.writerows(self.geracoes)
@@ -0,0 +1,58 @@
+import csv
+import json
+import os
+
+
+# matplotlib só é importado quando um gráfico é pedido, para que os processos
+# do solver iniciem rápido e nunca dependam de um display
+def plotar_evolucao(historico, caminho=None, mostrar=False):
+    if caminho is None and not mostrar:
+        return
+
+    if mostrar:
+        import matplotlib.pyplot as plt
+        figura = plt.figure(figsize=(12, 6))
+    else:
+        # Figura desvinculada do pyplot, desenhada pelo backend Agg
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figura = Figure(figsize=(12, 6))
+        FigureCanvasAgg(figura)
+
+    eixo = figura.add_subplot(1, 2, 1)
+    eixo.plot(historico)
+    eixo.set_title("Evolução do Melhor Fitness")
+    eixo.set_xlabel("Geração")
+    eixo.set_ylabel("Fitness")
+    eixo.grid(True)
+    figura.tight_layout()
+
+    if caminho is not None:
+        # O formato (PNG, SVG, PDF...) vem da extensão do arquivo
+        figura.savefig(caminho)
+    if mostrar:
+        plt.show()
+
+
+class HistoricoArquivo:
+    # Grava o histórico de fitness geração a geração em CSV ou JSONL (pela
+    # extensão), com flush a cada linha para poder ser acompanhado durante a
+    # execução
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.jsonl = os.path.splitext(caminho)[1].lower() in ('.jsonl', '.ndjson')
+        self.arquivo = open(caminho, 'w', encoding='utf-8', newline='')
+        if not self.jsonl:
+            self.escritor = csv.writer(self.arquivo)
+            self.escritor.writerow(['geracao', 'melhor_fitness', 'tempo'])
+
+    def registrar(self, geracao, melhor_fitness, tempo):
+        if self.jsonl:
+            self.arquivo.write(json.dumps(
+                {'geracao': geracao, 'melhor_fitness': melhor_fitness, 'tempo': tempo}) + '\n')
+        else:
+            self.escritor.writerow([geracao, repr(melhor_fitness), f"{tempo:.6f}"])
+        self.arquivo.flush()
+
+    def fechar(self):
+        self.arquivo.close()
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+# Operadores de seleção em lote: recebem o vetor de fitness da população
+# (menor é melhor), o número de pares e um np.random.Generator, e devolvem
+# uma matriz (num_pares, 2) de posições na população. O custo é O(lote),
+# mais no máximo uma passada O(n) ou uma ordenação do vetor por lote
+
+def selecao_torneio(fitness, num_pares, rng, tamanho_torneio=2):
+    # Cada pai é o melhor de tamanho_torneio indivíduos sorteados com reposição
+    competidores = rng.integers(len(fitness), size=(2 * num_pares, tamanho_torneio))
+    vencedores = np.argmin(fitness[competidores], axis=1)
+    return competidores[np.arange(2 * num_pares), vencedores].reshape(num_pares, 2)
+
+
+def selecao_ranking(fitness, num_pares, rng, pressao=1.5):
+    # Ranking linear: o melhor recebe peso pressao e o pior 2 - pressao
+    # (1 <= pressao <= 2), independentemente da escala do fitness
+    if not 1 <= pressao <= 2:
+        raise ValueError("A pressão do ranking deve estar entre 1 e 2")
+    num_individuos = len(fitness)
+    ordem = np.argsort(fitness, kind='stable')
+    pesos = pressao - (2 * pressao - 2) * np.arange(num_individuos) / max(num_individuos - 1, 1)
+    acumulado = np.cumsum(pesos)
+    sorteio = rng.random(2 * num_pares) * acumulado[-1]
+    posicoes = np.minimum(np.searchsorted(acumulado, sorteio, side='right'), num_individuos - 1)
+    return ordem[posicoes].reshape(num_pares, 2)
+
+
+def amostragem_universal(fitness, num_pares, rng):
+    # Amostragem universal estocástica: um único sorteio e 2 * num_pares
+    # ponteiros igualmente espaçados sobre a roleta. Como o fitness é
+    # minimizado, o peso é a distância ao pior; população uniforme (ou com
+    # um único valor) vira sorteio uniforme. Os pais são embaralhados antes
+    # de formar os pares, senão vizinhos na roleta cruzariam entre si
+    num_individuos = len(fitness)
+    pesos = np.max(fitness) - fitness
+    if not pesos.sum() > 0:
+        pesos = np.ones(num_individuos)
+    acumulado = np.cumsum(pesos)
+    passo = acumulado[-1] / (2 * num_pares)
+    ponteiros = (rng.random() + np.arange(2 * num_pares)) * passo
+    posicoes = np.minimum(np.searchsorted(acumulado, ponteiros, side='right'), num_individuos - 1)
+    return rng.permutation(posicoes).reshape(num_pares, 2)
+
+
+OPERADORES_SELECAO = {
+    'torneio': selecao_torneio,
+    'ranking': selecao_ranking,
+    'sus': amostragem_universal
+}
@@ -0,0 +1,559 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from AGTurmas import AlocacaoTurmasAG, validar_parametros
+from AGValidacao import validar_bloco, validar_sala, validar_turma
+
+
+TAMANHO_CACHE_INSTANCIAS = 4
+INTERVALO_PROGRESSO = 0.2
+TEMPO_LIMITE_MAXIMO = 600.0
+# Folga sobre o tempo limite antes de reiniciar à força o worker de uma
+# requisição: o critério de parada só é verificado entre gerações
+FOLGA_TEMPO_LIMITE = 30.0
+# Uma requisição traz a instância inteira numa única linha
+LIMITE_LINHA = 256 * 1024 * 1024
+
+PARAMETROS_PADRAO = {
+    'tamanho_populacao': 100,
+    'num_geracoes': 200,
+    'novos_individuos_por_geracao': 3,
+    'taxa_crossover': 150,
+    'periodos_sem_evolucao': 9
+}
+# Parâmetros que gravam arquivos, abrem janelas ou criam pools dentro do worker
+PARAMETROS_RECUSADOS = ('checkpoint', 'arquivo_historico', 'grafico', 'mostrar_grafico',
+                        'workers', 'instrumentacao')
+# Estruturas montadas sob demanda que não dependem dos parâmetros da execução
+ESTRUTURAS_REAPROVEITADAS = ('plano_inicializacao', 'problemas_atribuicao')
+
+
+def chave_instancia(salas, blocos):
+    # O campus (salas e blocos) identifica a instância em cache; as turmas
+    # variam entre requisições e são aplicadas como alterações
+    texto = json.dumps([salas, blocos], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def _validar_registros(registros, validar, nome):
+    # Mesmas verificações da leitura dos arquivos (AGDados), antes de a
+    # requisição chegar a um worker e à instância em cache
+    if not isinstance(registros, list):
+        raise ValueError(f"'{nome}' deve ser uma lista de registros")
+    validados, ids = [], set()
+    for indice, registro in enumerate(registros):
+        validado = validar(registro, f"{nome}[{indice}]")
+        if validado['id'] in ids:
+            raise ValueError(f"{nome}[{indice}]: ID duplicado: {validado['id']}")
+        ids.add(validado['id'])
+        validados.append(validado)
+    return validados
+
+
+def _validar_blocos(blocos):
+    if not isinstance(blocos, dict):
+        raise ValueError("'blocos' deve ser um objeto de ID para bloco")
+    validados = {}
+    for id_bloco, bloco in blocos.items():
+        if not isinstance(bloco, dict):
+            raise ValueError(f"blocos[{id_bloco}]: o bloco deve ser um objeto")
+        validado = validar_bloco(dict(bloco, id=id_bloco), f"blocos[{id_bloco}]")
+        validados[id_bloco] = {'posicao': validado['posicao']}
+    return validados
+
+
+def _alteracoes_turmas(atuais, novas):
+    # Turmas alteradas são removidas e adicionadas de novo, para que campos
+    # ausentes no registro novo não sejam herdados do anterior
+    anteriores = {t['id']: t for t in atuais}
+    ids_novos = {t['id'] for t in novas}
+    alteradas = [t for t in novas if t['id'] in anteriores and anteriores[t['id']] != t]
+    alteracoes = [('remover_turma', id_turma) for id_turma in anteriores if id_turma not in ids_novos]
+    alteracoes += [('remover_turma', t['id']) for t in alteradas]
+    alteracoes += [('adicionar_turma', t) for t in novas
+                   if t['id'] not in anteriores or anteriores[t['id']] != t]
+    return alteracoes
+
+
+def _ordem_apos_alteracoes(atuais, alteracoes):
+    # aplicar_alteracoes compacta as turmas removidas e acrescenta as novas
+    # (inclusive as alteradas) ao fim, nessa ordem
+    removidas = {valor for operacao, valor in alteracoes if operacao == 'remover_turma'}
+    return ([t['id'] for t in atuais if t['id'] not in removidas] +
+            [valor['id'] for operacao, valor in alteracoes if operacao == 'adicionar_turma'])
+
+
+def _valor_json(valor):
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+def _preparar_instancia(cache, tarefa, tamanho_cache):
+    # Devolve a instância pré-processada da chave e como foi obtida: 'quente'
+    # (em cache, mesmas turmas), 'alterado' (em cache, turmas aplicadas com
+    # aplicar_alteracoes) ou 'frio' (pré-processada do zero)
+    inicio = time.perf_counter()
+    chave, turmas = tarefa['chave'], tarefa.get('turmas')
+    base = cache.get(chave)
+    if base is None:
+        if tarefa.get('salas') is None or tarefa.get('blocos') is None or turmas is None:
+            raise ValueError(f"Instância {chave} não está em cache: envie turmas, salas e blocos")
+        base = AlocacaoTurmasAG(turmas, tarefa['salas'], tarefa['blocos'], {})
+        estado = 'frio'
+    else:
+        alteracoes = _alteracoes_turmas(base.turmas, turmas) if turmas is not None else []
+        if len(alteracoes) > len(base.turmas) or (
+                turmas is not None and
+                _ordem_apos_alteracoes(base.turmas, alteracoes) != [t['id'] for t in turmas]):
+            # Mais barato pré-processar de novo que aplicar as alterações, ou
+            # a ordem dos genes ficaria diferente da requisição e, com ela, o
+            # resultado para a mesma semente
+            base = AlocacaoTurmasAG(turmas, base.salas, base.blocos, {})
+            estado = 'frio'
+        elif alteracoes:
+            try:
+                base.aplicar_alteracoes(alteracoes)
+            except Exception:
+                # Não arrisca servir de novo uma instância com estado incerto
+                cache.pop(chave, None)
+                raise
+            estado = 'alterado'
+        else:
+            estado = 'quente'
+
+    cache[chave] = base
+    cache.move_to_end(chave)
+    while len(cache) > tamanho_cache:
+        cache.popitem(last=False)
+    return base, estado, time.perf_counter() - inicio
+
+
+def _executar_tarefa(base, tarefa, saida, intervalo_progresso):
+    ag = base._copia_estatica(tarefa['parametros'])
+    ultimo_envio = [time.perf_counter()]
+    inicio = ultimo_envio[0]
+    executar_geracao = ag.executar_geracao
+
+    # Envolve executar_geracao só nesta cópia em vez de usar os callbacks da
+    # Instrumentacao, que medem todas as fases (~18% mais lento na instância
+    # média); o melhor fitness vem do cache
+    def executar_geracao_com_progresso(pool):
+        executar_geracao(pool)
+        agora = time.perf_counter()
+        if agora - ultimo_envio[0] >= intervalo_progresso:
+            ultimo_envio[0] = agora
+            saida.put((tarefa['id'], 'progresso', {
+                'geracao': len(ag.melhor_fitness_historico),
+                'melhor_fitness': float(ag.calcular_fitness(ag._melhor_individuo())['fitness_total']),
+                'tempo': agora - inicio
+            }))
+
+    ag.executar_geracao = executar_geracao_com_progresso
+    if tarefa.get('semente') is not None:
+        random.seed(tarefa['semente'])
+    alocacao, resultado = ag.executar()
+
+    # A próxima requisição da mesma instância reaproveita o que esta montou
+    for atributo in ESTRUTURAS_REAPROVEITADAS:
+        if getattr(base, atributo) is None:
+            setattr(base, atributo, getattr(ag, atributo))
+    return {
+        'alocacao': alocacao,
+        'resultado': {nome: _valor_json(valor) for nome, valor in resultado.items()},
+        'geracoes': len(ag.melhor_fitness_historico) - 1,
+        'avaliacoes': ag.avaliacoes,
+        'tempo_execucao': time.perf_counter() - inicio
+    }
+
+
+def _trabalhador(entrada, saida, tamanho_cache, intervalo_progresso):
+    # Processo de longa duração: mantém as instâncias pré-processadas num
+    # cache LRU e resolve uma requisição por vez
+    cache = OrderedDict()
+    with open(os.devnull, 'w') as descarte:
+        while True:
+            tarefa = entrada.get()
+            if tarefa is None:
+                return
+            saida.put((tarefa['id'], 'iniciado', {}))
+            try:
+                base, estado, tempo_preparo = _preparar_instancia(cache, tarefa, tamanho_cache)
+                with contextlib.redirect_stdout(descarte):
+                    resposta = _executar_tarefa(base, tarefa, saida, intervalo_progresso)
+                resposta.update(cache=estado, tempo_preparo=tempo_preparo)
+                tipo = 'resultado'
+            except Exception as e:
+                tipo, resposta = 'erro', {'mensagem': f"{type(e).__name__}: {e}"}
+            resposta['chaves'] = list(cache)
+            saida.put((tarefa['id'], tipo, resposta))
+
+
+class Trabalhador:
+    def __init__(self, contexto, tamanho_cache, intervalo_progresso, receber):
+        self.entrada = contexto.Queue()
+        self.saida = contexto.Queue()
+        self.processo = contexto.Process(
+            target=_trabalhador, args=(self.entrada, self.saida, tamanho_cache, intervalo_progresso),
+            daemon=True)
+        self.processo.start()
+        # Chaves em cache no processo, atualizadas a cada resposta final
+        self.chaves = []
+        self.leitor = threading.Thread(target=self._ler_saida, args=(receber,), daemon=True)
+        self.leitor.start()
+
+    def _ler_saida(self, receber):
+        while True:
+            mensagem = self.saida.get()
+            if mensagem is None:
+                return
+            receber(self, mensagem)
+
+    def encerrar(self, forcar=False):
+        if forcar:
+            self.processo.terminate()
+        else:
+            self.entrada.put(None)
+        self.processo.join(5)
+        if self.processo.is_alive():
+            self.processo.kill()
+            self.processo.join()
+        self.saida.put(None)
+
+
+class ServidorAG:
+    def __init__(self, num_workers=1, tamanho_cache=TAMANHO_CACHE_INSTANCIAS,
+                 parametros_padrao=None, tempo_limite_maximo=TEMPO_LIMITE_MAXIMO,
+                 intervalo_progresso=INTERVALO_PROGRESSO, folga_tempo_limite=FOLGA_TEMPO_LIMITE):
+        if num_workers < 1:
+            raise ValueError(f"Número de workers deve ser positivo: {num_workers}")
+        self.num_workers = num_workers
+        self.tamanho_cache = tamanho_cache
+        self.parametros_padrao = dict(PARAMETROS_PADRAO, **(parametros_padrao or {}))
+        self.tempo_limite_maximo = tempo_limite_maximo
+        self.intervalo_progresso = intervalo_progresso
+        self.folga_tempo_limite = folga_tempo_limite
+        self.contexto = multiprocessing.get_context('spawn')
+        self.trabalhadores = []
+        # id interno -> (fila da requisição, trabalhador)
+        self.tarefas = {}
+        self.ids = itertools.count()
+        self.requisicoes = 0
+        self.servidor = None
+        self.loop = None
+
+    def _novo_trabalhador(self):
+        return Trabalhador(self.contexto, self.tamanho_cache, self.intervalo_progresso,
+                           self._receber_thread)
+
+    async def iniciar(self, caminho_socket=None, host='127.0.0.1', porta=None):
+        self.loop = asyncio.get_running_loop()
+        self.trabalhadores = [self._novo_trabalhador() for _ in range(self.num_workers)]
+        if caminho_socket is not None:
+            self.servidor = await asyncio.start_unix_server(
+                self._atender_conexao, caminho_socket, limit=LIMITE_LINHA)
+        else:
+            self.servidor = await asyncio.start_server(
+                self._atender_conexao, host, porta, limit=LIMITE_LINHA)
+        return self.servidor
+
+    async def fechar(self):
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        for trabalhador in self.trabalhadores:
+            await asyncio.to_thread(trabalhador.encerrar)
+        self.trabalhadores = []
+
+    def _receber_thread(self, trabalhador, mensagem):
+        self.loop.call_soon_threadsafe(self._receber, trabalhador, mensagem)
+
+    def _receber(self, trabalhador, mensagem):
+        id_tarefa, tipo, dados = mensagem
+        if 'chaves' in dados:
+            trabalhador.chaves = dados.pop('chaves')
+        registro = self.tarefas.get(id_tarefa)
+        # Mensagens atrasadas de um worker reiniciado são descartadas
+        if registro is not None and registro[1] is trabalhador:
+            registro[0].put_nowait((tipo, dados))
+
+    def _pendentes(self, trabalhador):
+        return sum(1 for _, dono in self.tarefas.values() if dono is trabalhador)
+
+    def _escolher_trabalhador(self, chave):
+        # Prefere um worker livre que já tenha a instância em cache, depois
+        # qualquer worker livre e, com todos ocupados, o de menor fila
+        # (entre os que têm a instância, se houver)
+        com_chave = [t for t in self.trabalhadores if chave in t.chaves]
+        livres = [t for t in self.trabalhadores if not self._pendentes(t)]
+        candidatos = [t for t in com_chave if t in livres] or livres or com_chave or self.trabalhadores
+        return min(candidatos, key=self._pendentes)
+
+    async def _reiniciar(self, trabalhador, motivo):
+        # O cache do worker é perdido; as requisições na fila dele falham
+        if trabalhador not in self.trabalhadores:
+            return
+        self.trabalhadores[self.trabalhadores.index(trabalhador)] = self._novo_trabalhador()
+        for fila, dono in self.tarefas.values():
+            if dono is trabalhador:
+                fila.put_nowait(('erro', {'mensagem': f"Worker reiniciado: {motivo}"}))
+        await asyncio.to_thread(trabalhador.encerrar, True)
+
+    def _montar_tarefa(self, requisicao):
+        turmas, salas, blocos = (requisicao.get('turmas'), requisicao.get('salas'),
+                                 requisicao.get('blocos'))
+        if turmas is not None:
+            turmas = _validar_registros(turmas, validar_turma, 'turmas')
+        if salas is not None:
+            salas = _validar_registros(salas, validar_sala, 'salas')
+        if blocos is not None:
+            blocos = _validar_blocos(blocos)
+        chave = requisicao.get('chave')
+        if chave is None:
+            if salas is None or blocos is None:
+                raise ValueError("Requisição sem 'chave' deve trazer salas e blocos")
+            chave = chave_instancia(salas, blocos)
+
+        parametros = dict(self.parametros_padrao)
+        for nome, valor in (requisicao.get('parametros') or {}).items():
+            if nome in PARAMETROS_RECUSADOS:
+                raise ValueError(f"Parâmetro não aceito pelo serviço: {nome}")
+            parametros[nome] = valor
+        validar_parametros(parametros)
+        tempo_limite = requisicao.get('tempo_limite', parametros.get('tempo_limite'))
+        parametros['tempo_limite'] = (self.tempo_limite_maximo if tempo_limite is None
+                                      else min(float(tempo_limite), self.tempo_limite_maximo))
+        parametros['workers'] = 1
+        return {'id': next(self.ids), 'chave': chave, 'turmas': turmas, 'salas': salas,
+                'blocos': blocos, 'parametros': parametros, 'semente': requisicao.get('semente')}
+
+    async def _resolver(self, requisicao, enviar):
+        tarefa = self._montar_tarefa(requisicao)
+        trabalhador = self._escolher_trabalhador(tarefa['chave'])
+        na_fila = self._pendentes(trabalhador)
+        fila = asyncio.Queue()
+        self.tarefas[tarefa['id']] = (fila, trabalhador)
+        if tarefa['chave'] not in trabalhador.chaves:
+            trabalhador.chaves.append(tarefa['chave'])
+        trabalhador.entrada.put(tarefa)
+        await enviar({'tipo': 'aceito', 'chave': tarefa['chave'],
+                      'worker': self.trabalhadores.index(trabalhador), 'na_fila': na_fila})
+
+        # O prazo conta a partir do início da execução no worker, não da
+        # espera na fila
+        prazo = None
+        try:
+            while True:
+                restante = None if prazo is None else max(prazo - self.loop.time(), 0)
+                try:
+                    tipo, dados = await asyncio.wait_for(fila.get(), restante)
+                except asyncio.TimeoutError:
+                    prazo = None
+                    await self._reiniciar(trabalhador, "tempo limite excedido")
+                    continue
+                if tipo == 'iniciado':
+                    prazo = (self.loop.time() + tarefa['parametros']['tempo_limite'] +
+                             self.folga_tempo_limite)
+                await enviar(dict(dados, tipo=tipo))
+                if tipo in ('resultado', 'erro'):
+                    return
+        finally:
+            self.tarefas.pop(tarefa['id'], None)
+
+    def estatisticas(self):
+        return {
+            'requisicoes': self.requisicoes,
+            'workers': [{'pid': t.processo.pid, 'pendentes': self._pendentes(t), 'chaves': t.chaves}
+                        for t in self.trabalhadores]
+        }
+
+    async def _atender(self, requisicao, enviar):
+        id_requisicao = requisicao.get('id') if isinstance(requisicao, dict) else None
+
+        async def enviar_requisicao(mensagem):
+            await enviar(dict(mensagem, id=id_requisicao))
+
+        try:
+            if not isinstance(requisicao, dict):
+                raise ValueError("A requisição deve ser um objeto JSON")
+            operacao = requisicao.get('operacao', 'resolver')
+            self.requisicoes += 1
+            if operacao == 'resolver':
+                await self._resolver(requisicao, enviar_requisicao)
+            elif operacao == 'estatisticas':
+                await enviar_requisicao(dict(self.estatisticas(), tipo='estatisticas'))
+            else:
+                raise ValueError(f"Operação desconhecida: {operacao} (use resolver ou estatisticas)")
+        except (ValueError, TypeError) as e:
+            await enviar_requisicao({'tipo': 'erro', 'mensagem': str(e)})
+
+    async def _atender_conexao(self, leitor, escritor):
+        # Uma requisição JSON por linha; as respostas das requisições
+        # simultâneas de uma conexão são intercaladas, cada uma com seu 'id'
+        trava = asyncio.Lock()
+
+        async def enviar(mensagem):
+            async with trava:
+                escritor.write((json.dumps(mensagem, ensure_ascii=False) + '\n').encode('utf-8'))
+                with contextlib.suppress(ConnectionError):
+                    await escritor.drain()
+
+        pendentes = set()
+        try:
+            while linha := await leitor.readline():
+                if not linha.strip():
+                    continue
+                try:
+                    requisicao = json.loads(linha)
+                except json.JSONDecodeError as e:
+                    await enviar({'id': None, 'tipo': 'erro', 'mensagem': f"JSON inválido: {e}"})
+                    continue
+                tarefa = asyncio.create_task(self._atender(requisicao, enviar))
+                pendentes.add(tarefa)
+                tarefa.add_done_callback(pendentes.discard)
+            # Fim da entrada: responde o que falta antes de fechar
+            if pendentes:
+                await asyncio.gather(*pendentes)
+        finally:
+            escritor.close()
+            with contextlib.suppress(ConnectionError):
+                await escritor.wait_closed()
+
+
+async def resolver(requisicao, caminho_socket=None, host='127.0.0.1', porta=None,
+                   ao_progresso=None):
+    # Cliente: envia uma requisição e devolve a mensagem final ('resultado');
+    # ao_progresso recebe cada mensagem intermediária
+    if caminho_socket is not None:
+        leitor, escritor = await asyncio.open_unix_connection(caminho_socket, limit=LIMITE_LINHA)
+    else:
+        leitor, escritor = await asyncio.open_connection(host, porta, limit=LIMITE_LINHA)
+    try:
+        escritor.write((json.dumps(requisicao, ensure_ascii=False) + '\n').encode('utf-8'))
+        await escritor.drain()
+        while linha := await leitor.readline():
+            mensagem = json.loads(linha)
+            if mensagem['tipo'] in ('resultado', 'estatisticas'):
+                return mensagem
+            if mensagem['tipo'] == 'erro':
+                raise RuntimeError(mensagem['mensagem'])
+            if ao_progresso is not None:
+                ao_progresso(mensagem)
+        raise RuntimeError("Conexão encerrada pelo servidor sem resposta")
+    finally:
+        escritor.close()
+        with contextlib.suppress(ConnectionError):
+            await escritor.wait_closed()
+
+
+async def _servir(args):
+    servidor = ServidorAG(args.workers, args.cache, tempo_limite_maximo=args.tempo_limite_maximo)
+    await servidor.iniciar(args.socket, args.host, args.porta)
+    print(f"Servindo em {args.socket or f'{args.host}:{args.porta}'} com {args.workers} workers",
+          flush=True)
+    parar = asyncio.Event()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        # add_signal_handler não existe no Windows; lá vale o KeyboardInterrupt
+        with contextlib.suppress(NotImplementedError):
+            asyncio.get_running_loop().add_signal_handler(sinal, parar.set)
+    try:
+        await parar.wait()
+    finally:
+        await servidor.fechar()
+        if args.socket is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(args.socket)
+
+
+def _requisicao_cli(args):
+    from AGDados import ler_blocos, ler_salas, ler_turmas
+
+    requisicao = {
+        'id': 1,
+        'parametros': {'tamanho_populacao': args.populacao, 'num_geracoes': args.geracoes},
+        'tempo_limite': args.tempo_limite,
+        'semente': args.semente
+    }
+    if args.chave:
+        requisicao['chave'] = args.chave
+    if args.turmas:
+        requisicao['turmas'] = list(ler_turmas(args.turmas))
+    if args.salas and args.blocos:
+        requisicao['salas'] = list(ler_salas(args.salas))
+        requisicao['blocos'] = ler_blocos(args.blocos)
+    return requisicao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço do AG de alocação de turmas")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    for comando in ('servir', 'resolver'):
+        sub = subparsers.add_parser(comando)
+        sub.add_argument('--socket', help="caminho do socket Unix")
+        sub.add_argument('--host', default='127.0.0.1')
+        sub.add_argument('--porta', type=int, help="porta TCP (sem --socket)")
+    servir = subparsers.choices['servir']
+    servir.add_argument('--workers', type=int, default=1)
+    servir.add_argument('--cache', type=int, default=TAMANHO_CACHE_INSTANCIAS,
+                        help="instâncias pré-processadas mantidas por worker")
+    servir.add_argument('--tempo-limite-maximo', type=float, default=TEMPO_LIMITE_MAXIMO)
+    cliente = subparsers.choices['resolver']
+    cliente.add_argument('--turmas', help="arquivo de turmas (.jsonl ou .csv)")
+    cliente.add_argument('--salas', help="arquivo de salas (.jsonl ou .csv)")
+    cliente.add_argument('--blocos', help="arquivo de blocos (.jsonl ou .csv)")
+    cliente.add_argument('--chave', help="chave de uma instância já em cache no serviço")
+    cliente.add_argument('--populacao', type=int, default=100)
+    cliente.add_argument('--geracoes', type=int, default=200)
+    cliente.add_argument('--tempo-limite', type=float)
+    cliente.add_argument('--semente', type=int)
+    cliente.add_argument('--saida', help="grava a resposta final (.json)")
+    args = parser.parse_args(argv)
+    if args.socket is None and args.porta is None:
+        parser.error("informe --socket ou --porta")
+
+    if args.comando == 'servir':
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(_servir(args))
+        return 0
+
+    try:
+        requisicao = _requisicao_cli(args)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao carregar a instância: {e}", file=sys.stderr)
+        return 1
+
+    def mostrar(mensagem):
+        if mensagem['tipo'] == 'progresso':
+            print(f"Geração {mensagem['geracao']}: melhor fitness {mensagem['melhor_fitness']:.2f} "
+                  f"({mensagem['tempo']:.1f} s)")
+        elif mensagem['tipo'] == 'aceito':
+            print(f"Aceito pelo worker {mensagem['worker']} (instância {mensagem['chave']}, "
+                  f"{mensagem['na_fila']} na fila)")
+
+    try:
+        resposta = asyncio.run(resolver(requisicao, args.socket, args.host, args.porta, mostrar))
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    resultado = resposta['resultado']
+    print(f"Fitness {resultado['fitness_total']:.2f} em {resposta['geracoes']} gerações "
+          f"(cache {resposta['cache']}, preparo {resposta['tempo_preparo']:.2f} s, "
+          f"execução {resposta['tempo_execucao']:.2f} s, parada {resultado['criterio_parada']})")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resposta, arquivo, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
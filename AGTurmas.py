@@ -1,37 +1,383 @@
+import copy
+import heapq
+import math
+import multiprocessing
+import os
 import random
+import threading
 import numpy as np
 import time
-from collections import defaultdict, Counter
-import matplotlib.pyplot as plt
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, Counter, OrderedDict
+from itertools import compress
+from AGAtribuicao import atribuicao_minima
+from AGInstrumentacao import Instrumentacao
+from AGRelatorio import HistoricoArquivo, plotar_evolucao
+from AGSelecao import OPERADORES_SELECAO
+from AGValidacao import validar_sala, validar_turma
+
+
+SEM_SALA = -1
+SALA_LIVRE = -1
+TAMANHO_LOTE_FITNESS = 128
+TAMANHO_LOTE_INICIALIZACAO = 256
+TAMANHO_LOTE_ATRIBUICAO = 8
+TAMANHO_CACHE_FITNESS = 20000
+# Orçamentos da busca local em movimentos avaliados (não em tempo), para que
+# a trajetória dependa só da semente
+MOVIMENTOS_BUSCA_LOCAL = 20000
+MOVIMENTOS_REOTIMIZACAO = 100000
+MASCARA_64 = (1 << 64) - 1
+VERSAO_CHECKPOINT = 1
+
+
+def _misturar_64(x):
+    # splitmix64; gera o valor Zobrist de cada par (gene, sala)
+    x = (x + 0x9E3779B97F4A7C15) & MASCARA_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASCARA_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASCARA_64
+    return x ^ (x >> 31)
+
+
+def _misturar_64_vetor(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class CacheFitness:
+    # Cache LRU limitado de resultados de fitness, indexado pelo hash Zobrist
+    # do indivíduo; tamanho_maximo 0 desativa o cache
+    def __init__(self, tamanho_maximo=TAMANHO_CACHE_FITNESS):
+        self.tamanho_maximo = tamanho_maximo
+        self.entradas = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def obter(self, chave):
+        resultado = self.entradas.get(chave)
+        if resultado is None:
+            self.falhas += 1
+            return None
+        self.entradas.move_to_end(chave)
+        self.acertos += 1
+        return resultado
+
+    def guardar(self, chave, resultado):
+        if self.tamanho_maximo <= 0:
+            return
+        self.entradas[chave] = resultado
+        self.entradas.move_to_end(chave)
+        while len(self.entradas) > self.tamanho_maximo:
+            self.entradas.popitem(last=False)
+            self.remocoes += 1
+
+    def limpar(self):
+        self.entradas.clear()
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'remocoes': self.remocoes,
+            'tamanho': len(self.entradas),
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0
+        }
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+# Parâmetros inteiros e o menor valor aceito de cada um
+MINIMOS_PARAMETROS = {'tamanho_populacao': 1, 'num_geracoes': 0, 'novos_individuos_por_geracao': 1,
+                      'periodos_sem_evolucao': 1}
+MODOS_BUSCA_LOCAL = ('filhos', 'elite')
+
+
+def validar_parametros(parametros):
+    # Confere os parâmetros presentes; um valor inválido falharia só durante
+    # a execução, encerrada com o critério 'erro'
+    for nome, minimo in MINIMOS_PARAMETROS.items():
+        valor = parametros.get(nome)
+        if valor is not None and (isinstance(valor, bool) or
+                                  not isinstance(valor, (int, np.integer)) or valor < minimo):
+            raise ValueError(f"Parâmetro '{nome}' deve ser um inteiro >= {minimo}: {valor!r}")
+    selecao = parametros.get('selecao', 'elitista')
+    if selecao != 'elitista' and selecao not in OPERADORES_SELECAO:
+        raise ValueError(f"Operador de seleção desconhecido: {selecao}")
+    busca_local = parametros.get('busca_local')
+    if busca_local is not None and busca_local not in MODOS_BUSCA_LOCAL:
+        raise ValueError(f"Modo de busca local desconhecido: {busca_local} "
+                         f"(use {' ou '.join(MODOS_BUSCA_LOCAL)})")
+
+
+def _tamanho_cache_fitness(parametros):
+    if not parametros.get('cache_fitness', True):
+        return 0
+    return parametros.get('tamanho_cache_fitness', TAMANHO_CACHE_FITNESS)
+
+
+class Individuo:
+    __slots__ = ('genoma', 'estado', 'hash_zobrist', 'ocupacao')
+
+    def __init__(self, genoma, estado=None, hash_zobrist=None, ocupacao=None):
+        self.genoma = genoma
+        self.estado = estado
+        # Hash e ocupação (elemento de sala -> gene, ou SALA_LIVRE) são
+        # montados sob demanda; depois disso o genoma só deve ser alterado
+        # por atribuir_sala, que mantém os dois atualizados
+        self.hash_zobrist = hash_zobrist
+        self.ocupacao = ocupacao
+
+    def copia(self):
+        return Individuo(self.genoma.copy(),
+                         self.estado.copia() if self.estado is not None else None,
+                         self.hash_zobrist,
+                         self.ocupacao.copy() if self.ocupacao is not None else None)
+
+    def __eq__(self, outro):
+        if not isinstance(outro, Individuo):
+            return NotImplemented
+        return np.array_equal(self.genoma, outro.genoma)
+
+    def __hash__(self):
+        return hash(self.genoma.tobytes())
+
+    def __len__(self):
+        return len(self.genoma)
+
+
+class EstadoFitness:
+    # Contribuições de cada gene (capacidade + bloco) e de cada turma (salas
+    # distintas) para o fitness, permitindo atualizá-lo gene a gene
+    __slots__ = ('custo_gene', 'tamanho_gene', 'bloco_gene', 'chaves_turma',
+                 'alocados_turma', 'fitness_total', 'problemas_tamanho', 'problemas_bloco')
+
+    def copia(self):
+        copia = EstadoFitness()
+        copia.custo_gene = self.custo_gene.copy()
+        copia.tamanho_gene = self.tamanho_gene.copy()
+        copia.bloco_gene = self.bloco_gene.copy()
+        copia.chaves_turma = [dict(chaves) for chaves in self.chaves_turma]
+        copia.alocados_turma = list(self.alocados_turma)
+        copia.fitness_total = self.fitness_total
+        copia.problemas_tamanho = self.problemas_tamanho
+        copia.problemas_bloco = self.problemas_bloco
+        return copia
+
+
+class IndicePopulacao:
+    # Ordem da população por (fitness, sequência de inserção), a mesma da
+    # antiga ordenação estável completa: heap máximo para o pior e os dois
+    # melhores mantidos à parte. hashes conta os hashes Zobrist presentes
+    # quando a detecção de duplicados está ativa. fitness guarda o mesmo
+    # valor em um vetor, por posição, para os operadores de seleção
+    def __init__(self, populacao, fitness, hashes=None, sequencias=None, sequencia=None):
+        self.populacao = populacao
+        if sequencias is None:
+            sequencias = range(len(fitness))
+        self.chaves = [(float(f), int(s)) for f, s in zip(fitness, sequencias)]
+        self.fitness = np.array([f for f, _ in self.chaves], dtype=np.float64)
+        self.sequencia = len(self.chaves) if sequencia is None else sequencia
+        self.heap_pior = [(-f, -s, i) for i, (f, s) in enumerate(self.chaves)]
+        heapq.heapify(self.heap_pior)
+        self.melhores = heapq.nsmallest(
+            2, range(len(self.chaves)), key=self.chaves.__getitem__)
+        self.hashes = Counter(hashes) if hashes is not None else None
+
+    def valido_para(self, populacao):
+        return self.populacao is populacao and len(self.chaves) == len(populacao)
+
+    def pior(self):
+        return self.heap_pior[0][2]
+
+    def fitness_pior(self):
+        return -self.heap_pior[0][0]
+
+    def ordem(self):
+        return sorted(range(len(self.chaves)), key=self.chaves.__getitem__)
+
+    def _atualizar_melhores(self, posicao):
+        self.melhores.append(posicao)
+        self.melhores.sort(key=self.chaves.__getitem__)
+        del self.melhores[2:]
+
+    def inserir(self, fitness, hash_zobrist=None):
+        posicao = len(self.chaves)
+        self.chaves.append((fitness, self.sequencia))
+        self.fitness = np.append(self.fitness, fitness)
+        self.sequencia += 1
+        heapq.heappush(self.heap_pior, (-fitness, -self.chaves[posicao][1], posicao))
+        if self.hashes is not None:
+            self.hashes[hash_zobrist] += 1
+        self._atualizar_melhores(posicao)
+
+    def substituir_pior(self, fitness, hash_novo=None, hash_antigo=None):
+        posicao = self.pior()
+        self.chaves[posicao] = (fitness, self.sequencia)
+        self.fitness[posicao] = fitness
+        self.sequencia += 1
+        heapq.heapreplace(self.heap_pior, (-fitness, -self.chaves[posicao][1], posicao))
+        if self.hashes is not None:
+            self.hashes[hash_antigo] -= 1
+            if not self.hashes[hash_antigo]:
+                del self.hashes[hash_antigo]
+            self.hashes[hash_novo] += 1
+        if posicao in self.melhores:
+            # Só acontece com até dois indivíduos na população
+            self.melhores = heapq.nsmallest(
+                2, range(len(self.chaves)), key=self.chaves.__getitem__)
+        else:
+            self._atualizar_melhores(posicao)
+        return posicao
+
+
+class GravadorCheckpoint:
+    # Grava checkpoints .npz numa thread, um por vez: o arquivo é escrito ao
+    # lado do destino e movido com os.replace, então um checkpoint
+    # interrompido nunca substitui o anterior
+    def __init__(self):
+        self.thread = None
+        self.erro = None
+
+    def _gravar(self, caminho, dados):
+        temporario = f"{caminho}.tmp"
+        try:
+            with open(temporario, 'wb') as arquivo:
+                np.savez_compressed(arquivo, **dados)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            os.replace(temporario, caminho)
+        except Exception as e:
+            # Não deixa um checkpoint parcial ao lado do destino
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            self.erro = e
+
+    def gravar(self, caminho, dados):
+        self.aguardar()
+        self.thread = threading.Thread(target=self._gravar, args=(caminho, dados), daemon=True)
+        self.thread.start()
+
+    def aguardar(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.erro is not None:
+            erro, self.erro = self.erro, None
+            raise erro
+
+
+# Instância estática (sem população) de cada processo do pool de filhos;
+# recebida uma única vez no inicializador do pool
+_ag_trabalhador = None
+
+
+def _iniciar_trabalhador(ag):
+    global _ag_trabalhador
+    _ag_trabalhador = ag
+
+
+def _gerar_filhos_trabalhador(semente, genomas, hashes, resultados, num_filhos, pares=None,
+                              medir=False):
+    ag = _ag_trabalhador
+    random.seed(semente)
+    # Com instrumentação, as fases medidas aqui voltam ao processo principal
+    if medir:
+        if ag.instrumentacao is None:
+            ag.instrumentacao = Instrumentacao()
+            ag.instrumentacao.instalar(ag)
+        ag.instrumentacao.tempos.clear()
+        ag.instrumentacao.chamadas.clear()
+
+    ag.populacao = []
+    ag.fitness_cache.limpar()
+    ag.estatisticas_busca_local = dict.fromkeys(ag.estatisticas_busca_local, 0)
+    for genoma, hash_zobrist, resultado in zip(genomas, hashes, resultados):
+        ag.populacao.append(Individuo(genoma, hash_zobrist=hash_zobrist))
+        ag.fitness_cache.guardar(hash_zobrist, resultado)
+
+    filhos = []
+    for k in range(num_filhos):
+        if pares is None:
+            pai1, pai2 = ag.selecionar_pais()
+        else:
+            pai1, pai2 = ag.populacao[pares[k][0]], ag.populacao[pares[k][1]]
+        filho = ag.gerar_filho(pai1, pai2)
+        resultado = ag.calcular_fitness_lote([filho])
+        filhos.append((filho.genoma, ag.hash_individuo(filho), {
+            'fitness_total': float(resultado['fitness_total'][0]),
+            'problemas_tamanho': int(resultado['problemas_tamanho'][0]),
+            'problemas_bloco': int(resultado['problemas_bloco'][0])
+        }))
+    fases = None
+    if medir:
+        fases = (dict(ag.instrumentacao.tempos), dict(ag.instrumentacao.chamadas))
+    return filhos, ag.estatisticas_busca_local, fases
+
+
+def _criar_individuos_trabalhador(semente, quantidade):
+    genomas = _ag_trabalhador._criar_genomas_lote(semente, quantidade)
+    return genomas.tobytes()
+
+
+def _criar_individuos_atribuicao_trabalhador(semente, quantidade, incluir_otima):
+    genomas = _ag_trabalhador._criar_genomas_atribuicao(semente, quantidade, incluir_otima)
+    return genomas.tobytes()
 
 
 class AlocacaoTurmasAG:
     def __init__(self, turmas, salas, blocos, parametros):
-        self.turmas = turmas
-        self.salas = salas
+        # turmas e salas podem ser quaisquer iteráveis (como os leitores de
+        # AGDados); os registros são guardados sem cópia
+        self.turmas = list(turmas)
+        self.salas = list(salas)
         self.blocos = blocos
         self.parametros = parametros
 
         self.verificar_dados()
-        self.preprocessar_dados()
+        validar_parametros(parametros)
+        self._construir_indices()
 
         self.populacao = []
         self.taxa_evolucao = 0
         self.limite_insercao = 1
         self.melhor_fitness_historico = []
         self.contador_sem_evolucao = 0
-        self.fitness_cache = {}
-
+        self.indice_populacao = None
+        self.fitness_cache = CacheFitness(_tamanho_cache_fitness(parametros))
+        self.avaliacoes = 0
+        self.criterio_parada = None
+        self.instrumentacao = None
+        if parametros.get('instrumentacao', False):
+            self.ativar_instrumentacao()
+        self.estatisticas_busca_local = {'execucoes': 0, 'avaliados': 0, 'aceitos': 0, 'tempo': 0.0}
+
+    def _construir_indices(self):
+        # Pré-processamento completo a partir de self.turmas e self.salas
+        self.preprocessar_dados()
         self.salas_por_bloco = defaultdict(list)
-        for sala in self.salas:
-            self.salas_por_bloco[sala['bloco']].append(sala)
-
         self.salas_por_horario = defaultdict(list)
-        for sala in self.salas:
-            for horario in sala['horarios_disponiveis']:
-                self.salas_por_horario[horario].append(sala)
+        self.elemento_sala_por_id = {}
+        self.elemento_turma_por_id = {}
+        # Elementos de sala de cada (horario, tipo) ordenados por capacidade,
+        # para filtrar candidatas por faixa de capacidade com busca binária
+        self.salas_por_horario_tipo = defaultdict(list)
+        self.capacidades_por_horario_tipo = {}
+        self.indices_por_horario_tipo = {}
+        self.codigo_bloco = {}
+        self.bloco_salas_codigo = np.empty(0, dtype=np.int32)
+        self._indexar_elementos(self.salas, self.elementos_turma, self.elementos_sala_por_indice)
 
         self._preparar_estruturas_fitness()
+        self._preparar_estruturas_inicializacao()
+        self.problemas_atribuicao = None
+        self.candidatos_busca_local = None
 
     def verificar_dados(self):
         ids_turmas = set()
@@ -59,14 +405,170 @@ class AlocacaoTurmasAG:
         self.horarios_por_turma = defaultdict(list)
         self.elementos_por_turma = defaultdict(list)
 
-        for elemento in self.elementos_turma:
+        # Estruturas de calcular_fitness_lote. A parcela de capacidade depende
+        # só de (num_alunos, capacidade) e a de bloco só de (bloco_preferencial,
+        # bloco); cada uma tem sua tabela, calculada uma vez por par de valores
+        # distintos com as mesmas expressões da versão escalar. A última coluna
+        # de cada tabela representa SEM_SALA, de modo que o índice -1 do
+        # genoma cai nela sem tratamento especial.
+        self.valores_alunos = {}
+        self.valores_preferencia = {}
+        self.valores_capacidade = {}
+        self.valores_bloco = {}
+        self.codigos_chave = {}
+        self.codigos_turma = {}
+        self.codigo_alunos_elementos = np.empty(0, dtype=np.int32)
+        self.codigo_preferencia_elementos = np.empty(0, dtype=np.int32)
+        self.genes_elementos = np.empty(0, dtype=np.intp)
+        self.turma_elementos = np.empty(0, dtype=np.intp)
+        # Vetores por elemento de sala; a última posição é a de SEM_SALA
+        self.coluna_capacidade_salas = np.zeros(1, dtype=np.int32)
+        self.coluna_bloco_salas = np.zeros(1, dtype=np.int32)
+        self.chave_salas = np.full(1, -1, dtype=np.int32)
+        self.genes_por_turma_grupo = np.empty((0, 1), dtype=np.intp)
+        self._codificar_elementos(self.elementos_turma, self.elementos_sala_por_indice)
+
+    def _codificar_elementos(self, elementos_turma, elementos_sala):
+        # Acrescenta os elementos novos (sempre no fim das listas) às
+        # estruturas de fitness; valores ainda não vistos de alunos,
+        # capacidade, preferência ou bloco ganham linha ou coluna nas tabelas
+        for elemento in elementos_turma:
             self.horarios_por_turma[elemento['id_turma']].append(
                 elemento['horario'])
             self.elementos_por_turma[elemento['id_turma']].append(elemento)
 
+        self.codigo_alunos_elementos = np.concatenate([self.codigo_alunos_elementos, np.array(
+            [self.valores_alunos.setdefault(e['num_alunos'], len(self.valores_alunos))
+             for e in elementos_turma], dtype=np.int32)])
+        self.codigo_preferencia_elementos = np.concatenate([self.codigo_preferencia_elementos, np.array(
+            [self.valores_preferencia.setdefault(e['bloco_preferencial'], len(self.valores_preferencia))
+             for e in elementos_turma], dtype=np.int32)])
+        self.genes_elementos = np.concatenate([self.genes_elementos, np.array(
+            [e['indice'] for e in elementos_turma], dtype=np.intp)])
+        num_turmas = len(self.codigos_turma)
+        num_genes_anterior = self.num_genes - len({e['indice'] for e in elementos_turma})
+        codigos_turma = np.array(
+            [self.codigos_turma.setdefault(e['id_turma'], len(self.codigos_turma))
+             for e in elementos_turma], dtype=np.intp)
+        self.turma_elementos = np.concatenate([self.turma_elementos, codigos_turma])
+
+        coluna_capacidade = np.array(
+            [self.valores_capacidade.setdefault(s['capacidade'], len(self.valores_capacidade))
+             for s in elementos_sala], dtype=np.int32)
+        coluna_bloco = np.array(
+            [self.valores_bloco.setdefault(s['bloco'], len(self.valores_bloco))
+             for s in elementos_sala], dtype=np.int32)
+        # calcular_fitness conta salas distintas pelo prefixo do id_elemento;
+        # a última posição (SEM_SALA) recebe -1
+        chaves = np.array(
+            [self.codigos_chave.setdefault(s['id_elemento'].split('_')[0], len(self.codigos_chave))
+             for s in elementos_sala], dtype=np.int32)
+        self.coluna_capacidade_salas = np.concatenate([
+            self.coluna_capacidade_salas[:-1], coluna_capacidade, [len(self.valores_capacidade)]], dtype=np.int32)
+        self.coluna_bloco_salas = np.concatenate([
+            self.coluna_bloco_salas[:-1], coluna_bloco, [len(self.valores_bloco)]], dtype=np.int32)
+        self.chave_salas = np.concatenate(
+            [self.chave_salas[:-1], chaves, [-1]], dtype=np.int32)
+
+        # Agrupamento turma -> genes, completado com um gene sentinela
+        # (índice num_genes) que nunca está alocado. Elementos novos sempre
+        # pertencem a turmas novas
+        genes_por_turma = [[] for _ in range(len(self.codigos_turma) - num_turmas)]
+        for elemento, codigo in zip(elementos_turma, codigos_turma.tolist()):
+            genes = genes_por_turma[codigo - num_turmas]
+            if elemento['indice'] not in genes:
+                genes.append(elemento['indice'])
+        anterior = self.genes_por_turma_grupo
+        largura = max([anterior.shape[1]] + [len(g) for g in genes_por_turma])
+        self.genes_por_turma_grupo = np.full(
+            (len(self.codigos_turma), largura), self.num_genes, dtype=np.intp)
+        self.genes_por_turma_grupo[:num_turmas, :anterior.shape[1]] = np.where(
+            anterior == num_genes_anterior, self.num_genes, anterior)
+        for codigo, genes in enumerate(genes_por_turma, num_turmas):
+            self.genes_por_turma_grupo[codigo, :len(genes)] = genes
+
+        self._montar_tabelas_custo()
+        self._preparar_estruturas_genes()
+
+    def _montar_tabelas_custo(self):
+        self.num_colunas_capacidade = len(self.valores_capacidade) + 1
+        self.num_colunas_bloco = len(self.valores_bloco) + 1
+        self.linha_capacidade_elementos = \
+            self.codigo_alunos_elementos[:, None] * self.num_colunas_capacidade
+        self.linha_bloco_elementos = \
+            self.codigo_preferencia_elementos[:, None] * self.num_colunas_bloco
+
+        self.tabela_custo_capacidade = np.zeros(
+            (len(self.valores_alunos), self.num_colunas_capacidade))
+        self.tabela_problema_tamanho = np.zeros(
+            self.tabela_custo_capacidade.shape, dtype=bool)
+        self.tabela_custo_capacidade[:, -1] = 10000
+        for T, i in self.valores_alunos.items():
+            for C, j in self.valores_capacidade.items():
+                # T > C e C > T são exclusivos: uma única parcela de capacidade
+                if T > C:
+                    self.tabela_custo_capacidade[i, j] = 10 ** (T - C)
+                if C > T:
+                    self.tabela_custo_capacidade[i, j] = (
+                        C / 30) ** (abs(C - T) / 15)
+                    self.tabela_problema_tamanho[i, j] = True
+
+        self.tabela_custo_bloco = np.zeros(
+            (len(self.valores_preferencia), self.num_colunas_bloco))
+        self.tabela_problema_bloco = np.zeros(
+            self.tabela_custo_bloco.shape, dtype=bool)
+        for bloco_pref, i in self.valores_preferencia.items():
+            if not bloco_pref:
+                continue
+            for bloco, j in self.valores_bloco.items():
+                pos_bloco_pref = self.blocos.get(
+                    bloco_pref, {}).get('posicao', 0)
+                pos_bloco_sala = self.blocos.get(
+                    bloco, {}).get('posicao', 0)
+                self.tabela_custo_bloco[i, j] = abs(
+                    pos_bloco_pref - pos_bloco_sala) * 2
+                self.tabela_problema_bloco[i, j] = bloco_pref != bloco
+
+        self._custo_capacidade = self.tabela_custo_capacidade.ravel().tolist()
+        self._custo_bloco = self.tabela_custo_bloco.ravel().tolist()
+        self._problema_tamanho = self.tabela_problema_tamanho.ravel().astype(int).tolist()
+        self._problema_bloco = self.tabela_problema_bloco.ravel().astype(int).tolist()
+
+    def _preparar_estruturas_genes(self):
+        # Versões por gene (elementos repetidos compartilham o gene e contam
+        # em dobro) usadas pela avaliação incremental
+        turma_genes = np.zeros(self.num_genes, dtype=np.intp)
+        turma_genes[self.genes_elementos] = self.turma_elementos
+        self.turma_genes = turma_genes.tolist()
+        self.multiplicidade_genes = np.bincount(
+            self.genes_elementos, minlength=self.num_genes).astype(np.int32)
+        self.linha_capacidade_genes = np.zeros(self.num_genes, dtype=np.int32)
+        self.linha_capacidade_genes[self.genes_elementos] = self.linha_capacidade_elementos[:, 0]
+        self.linha_bloco_genes = np.zeros(self.num_genes, dtype=np.int32)
+        self.linha_bloco_genes[self.genes_elementos] = self.linha_bloco_elementos[:, 0]
+
+        self._coluna_capacidade_salas = self.coluna_capacidade_salas.tolist()
+        self._coluna_bloco_salas = self.coluna_bloco_salas.tolist()
+        self._chave_salas = self.chave_salas.tolist()
+        self._linha_capacidade_genes = self.linha_capacidade_genes.tolist()
+        self._linha_bloco_genes = self.linha_bloco_genes.tolist()
+        self._multiplicidade_genes = self.multiplicidade_genes.tolist()
+
     def preprocessar_dados(self):
+        # Cada id_elemento recebe um índice denso; o indivíduo é um vetor
+        # int32 indexado pelo elemento de turma com o índice da sala (ou SEM_SALA)
         self.elementos_turma = []
-        for turma in self.turmas:
+        self.indice_turma = {}
+        self.elementos_sala = []
+        self.indice_sala = {}
+        self.elementos_sala_por_indice = []
+        self._criar_elementos(self.turmas, self.salas)
+
+    def _criar_elementos(self, turmas, salas):
+        # Acrescenta os elementos das turmas e salas ao fim das listas, com
+        # índices seguintes aos existentes; devolve os elementos novos
+        novos_turma = []
+        for turma in turmas:
             for horario in turma['horarios']:
                 elemento = {
                     'id_turma': turma['id'],
@@ -76,10 +578,13 @@ class AlocacaoTurmasAG:
                     'tipo': turma.get('tipo', 'regular'),
                     'id_elemento': f"{turma['id']}_{horario}"
                 }
+                elemento['indice'] = self.indice_turma.setdefault(
+                    elemento['id_elemento'], len(self.indice_turma))
                 self.elementos_turma.append(elemento)
+                novos_turma.append(elemento)
 
-        self.elementos_sala = []
-        for sala in self.salas:
+        novos_sala = []
+        for sala in salas:
             for horario in sala['horarios_disponiveis']:
                 elemento = {
                     'id_sala': sala['id'],
@@ -89,83 +594,402 @@ class AlocacaoTurmasAG:
                     'tipo': sala.get('tipo', 'regular'),
                     'id_elemento': f"{sala['id']}_{horario}"
                 }
+                if elemento['id_elemento'] not in self.indice_sala:
+                    self.indice_sala[elemento['id_elemento']] = len(
+                        self.elementos_sala_por_indice)
+                    self.elementos_sala_por_indice.append(elemento)
+                    novos_sala.append(elemento)
+                elemento['indice'] = self.indice_sala[elemento['id_elemento']]
                 self.elementos_sala.append(elemento)
 
+        self.ids_turma = list(self.indice_turma)
+        self.num_genes = len(self.ids_turma)
+        self.num_salas_hash = len(self.elementos_sala_por_indice) + 1
+        return novos_turma, novos_sala
+
+    def _indexar_elementos(self, salas, elementos_turma, elementos_sala):
+        for sala in salas:
+            self.salas_por_bloco[sala['bloco']].append(sala)
+            for horario in sala['horarios_disponiveis']:
+                self.salas_por_horario[horario].append(sala)
+
+        for elemento in elementos_sala:
+            self.elemento_sala_por_id[elemento['id_elemento']] = elemento
+        for elemento in elementos_turma:
+            self.elemento_turma_por_id.setdefault(
+                elemento['id_elemento'], elemento)
+
+        # Os elementos novos têm os maiores índices; a ordenação estável os
+        # põe depois dos de mesma capacidade, como numa construção do zero
+        chaves = set()
+        for elemento in elementos_sala:
+            chave = (elemento['horario'], elemento['tipo'])
+            self.salas_por_horario_tipo[chave].append(elemento)
+            chaves.add(chave)
+        for chave in chaves:
+            self.salas_por_horario_tipo[chave].sort(key=lambda s: s['capacidade'])
+        self._atualizar_indices_horario_tipo(chaves)
+
+        self.bloco_salas_codigo = np.concatenate([self.bloco_salas_codigo, np.array(
+            [self.codigo_bloco.setdefault(s['bloco'], len(self.codigo_bloco))
+             for s in elementos_sala], dtype=np.int32)])
+
+    def _atualizar_indices_horario_tipo(self, chaves):
+        for chave in chaves:
+            elementos = self.salas_por_horario_tipo[chave]
+            self.capacidades_por_horario_tipo[chave] = [
+                s['capacidade'] for s in elementos]
+            self.indices_por_horario_tipo[chave] = np.array(
+                [s['indice'] for s in elementos], dtype=np.int32)
+
+    def _remover_turmas(self, ids_turmas):
+        # Tira os elementos das turmas e compacta os índices de genes e de
+        # turmas dos que ficam, preservando a ordem
+        manter_elementos = np.array(
+            [e['id_turma'] not in ids_turmas for e in self.elementos_turma], dtype=bool)
+        manter_genes = np.ones(self.num_genes, dtype=bool)
+        manter_genes[self.genes_elementos[~manter_elementos]] = False
+        num_genes = int(manter_genes.sum())
+        # A posição extra leva o gene sentinela antigo ao novo
+        mapa_genes = np.full(self.num_genes + 1, num_genes, dtype=np.intp)
+        mapa_genes[:-1][manter_genes] = np.arange(num_genes)
+
+        for elemento in compress(self.elementos_turma, ~manter_elementos):
+            self.elemento_turma_por_id.pop(elemento['id_elemento'], None)
+            self.horarios_por_turma.pop(elemento['id_turma'], None)
+            self.elementos_por_turma.pop(elemento['id_turma'], None)
+        self.elementos_turma = list(compress(self.elementos_turma, manter_elementos))
+        self.genes_elementos = mapa_genes[self.genes_elementos[manter_elementos]]
+        for elemento, indice in zip(self.elementos_turma, self.genes_elementos.tolist()):
+            elemento['indice'] = indice
+        self.ids_turma = list(compress(self.ids_turma, manter_genes))
+        self.indice_turma = {id_elemento: indice
+                             for indice, id_elemento in enumerate(self.ids_turma)}
+        self.num_genes = num_genes
+
+        manter_turmas = np.ones(len(self.codigos_turma), dtype=bool)
+        manter_turmas[self.turma_elementos[~manter_elementos]] = False
+        mapa_turmas = np.cumsum(manter_turmas) - 1
+        self.codigos_turma = {id_turma: int(mapa_turmas[codigo])
+                              for id_turma, codigo in self.codigos_turma.items()
+                              if manter_turmas[codigo]}
+        self.turma_elementos = mapa_turmas[self.turma_elementos[manter_elementos]]
+        self.genes_por_turma_grupo = mapa_genes[self.genes_por_turma_grupo[manter_turmas]]
+        self.codigo_alunos_elementos = self.codigo_alunos_elementos[manter_elementos]
+        self.codigo_preferencia_elementos = self.codigo_preferencia_elementos[manter_elementos]
+
+    def _remover_salas(self, ids_salas):
+        # Tira os elementos das salas e compacta os índices dos que ficam; os
+        # índices por (horario, tipo) das demais chaves são só remapeados
+        manter_salas = np.array(
+            [s['id_sala'] not in ids_salas for s in self.elementos_sala_por_indice], dtype=bool)
+        mapa_salas = np.full(len(manter_salas), SEM_SALA, dtype=np.int32)
+        mapa_salas[manter_salas] = np.arange(int(manter_salas.sum()))
+
+        chaves = set()
+        for elemento in compress(self.elementos_sala_por_indice, ~manter_salas):
+            del self.elemento_sala_por_id[elemento['id_elemento']]
+            chaves.add((elemento['horario'], elemento['tipo']))
+        self.elementos_sala_por_indice = list(compress(self.elementos_sala_por_indice, manter_salas))
+        # elementos_sala contém também os dicionários de elementos_sala_por_indice
+        self.elementos_sala = [e for e in self.elementos_sala if e['id_sala'] not in ids_salas]
+        mapa = mapa_salas.tolist()
+        for elemento in self.elementos_sala:
+            elemento['indice'] = mapa[elemento['indice']]
+        self.indice_sala = {e['id_elemento']: e['indice'] for e in self.elementos_sala_por_indice}
+        self.num_salas_hash = len(self.elementos_sala_por_indice) + 1
+
+        for chave in chaves:
+            self.salas_por_horario_tipo[chave] = [
+                s for s in self.salas_por_horario_tipo[chave] if s['id_sala'] not in ids_salas]
+        for chave, indices in self.indices_por_horario_tipo.items():
+            if chave not in chaves:
+                self.indices_por_horario_tipo[chave] = mapa_salas[indices]
+        self._atualizar_indices_horario_tipo(chaves)
+        for salas in list(self.salas_por_bloco.values()) + list(self.salas_por_horario.values()):
+            salas[:] = [sala for sala in salas if sala['id'] not in ids_salas]
+
+        self.bloco_salas_codigo = self.bloco_salas_codigo[manter_salas]
+        manter_colunas = np.append(manter_salas, True)
+        self.coluna_capacidade_salas = self.coluna_capacidade_salas[manter_colunas]
+        self.coluna_bloco_salas = self.coluna_bloco_salas[manter_colunas]
+        self.chave_salas = self.chave_salas[manter_colunas]
+
+    def _preparar_estruturas_inicializacao(self):
+        # Plano de construção da população inicial agrupado por horário:
+        # elementos de horários diferentes nunca disputam a mesma sala, então
+        # cada horário é construído sobre uma matriz de ocupação local
+        elementos_por_horario = defaultdict(list)
+        for elemento in self.elementos_turma:
+            elementos_por_horario[elemento['horario']].append(elemento)
+        salas_por_horario = defaultdict(list)
+        for elemento in self.elementos_sala_por_indice:
+            salas_por_horario[elemento['horario']].append(elemento['indice'])
+
+        self.plano_inicializacao = []
+        for horario, elementos in elementos_por_horario.items():
+            salas_horario = np.array(
+                sorted(salas_por_horario.get(horario, [])), dtype=np.int32)
+            locais_tipo = {}
+            passos = []
+            for elemento in elementos:
+                tipo = elemento['tipo']
+                if tipo not in locais_tipo:
+                    indices = self.indices_por_horario_tipo.get(
+                        (horario, tipo), np.empty(0, dtype=np.int32))
+                    locais_tipo[tipo] = (np.searchsorted(salas_horario, indices),
+                                         self.bloco_salas_codigo[indices])
+                inicio, _ = self._faixa_capacidade(horario, tipo, elemento['num_alunos'])
+                locais, blocos = locais_tipo[tipo]
+                if inicio >= len(locais):
+                    continue
+                passos.append((elemento['indice'], locais[inicio:], blocos[inicio:],
+                               self.codigo_bloco.get(elemento['bloco_preferencial'], -1)))
+            if passos:
+                self.plano_inicializacao.append((salas_horario, passos))
+
+    def _faixa_capacidade(self, horario, tipo, capacidade_minima, capacidade_maxima=None):
+        capacidades = self.capacidades_por_horario_tipo.get((horario, tipo), [])
+        inicio = bisect_left(capacidades, capacidade_minima)
+        fim = (len(capacidades) if capacidade_maxima is None
+               else bisect_right(capacidades, capacidade_maxima))
+        return inicio, fim
+
+    def _salas_livres(self, individuo, horario, tipo, capacidade_minima,
+                      capacidade_maxima=None, bloco=None):
+        inicio, fim = self._faixa_capacidade(
+            horario, tipo, capacidade_minima, capacidade_maxima)
+        if inicio >= fim:
+            return np.empty(0, dtype=np.int32)
+        candidatas = self.indices_por_horario_tipo[(horario, tipo)][inicio:fim]
+        livres = self.ocupacao_individuo(individuo)[candidatas] == SALA_LIVRE
+        if bloco is not None:
+            livres &= self.bloco_salas_codigo[candidatas] == self.codigo_bloco.get(
+                bloco, -1)
+        return candidatas[livres]
+
+    def nova_ocupacao(self):
+        return np.full(len(self.elementos_sala_por_indice), SALA_LIVRE, dtype=np.int32)
+
+    def ocupacao_individuo(self, individuo):
+        if individuo.ocupacao is None:
+            ocupacao = self.nova_ocupacao()
+            alocados = np.flatnonzero(individuo.genoma != SEM_SALA)
+            ocupacao[individuo.genoma[alocados]] = alocados
+            individuo.ocupacao = ocupacao
+        return individuo.ocupacao
+
+    def novo_genoma(self):
+        return np.full(self.num_genes, SEM_SALA, dtype=np.int32)
+
+    def codificar_individuo(self, individuo):
+        genoma = self.novo_genoma()
+        for id_elemento, id_sala_elemento in individuo.items():
+            if id_sala_elemento is not None:
+                genoma[self.indice_turma[id_elemento]
+                       ] = self.indice_sala[id_sala_elemento]
+        return Individuo(genoma)
+
+    def decodificar_individuo(self, individuo):
+        return {
+            id_elemento: (self.elementos_sala_por_indice[indice]['id_elemento']
+                          if indice != SEM_SALA else None)
+            for id_elemento, indice in zip(self.ids_turma, individuo.genoma.tolist())
+        }
+
     def criar_individuo_aleatorio(self):
-        individuo = {}
-        salas_ocupadas_por_horario = defaultdict(set)
+        individuo = Individuo(self.novo_genoma(), ocupacao=self.nova_ocupacao())
 
         for elemento in self.elementos_turma:
-            horario = elemento['horario']
-            salas_compativeis = [
-                s for s in self.elementos_sala
-                if s['horario'] == horario
-                and s['tipo'] == elemento['tipo']
-                and s['capacidade'] >= elemento['num_alunos']
-                and s['id_elemento'] not in salas_ocupadas_por_horario[horario]
-            ]
-
-            if salas_compativeis:
-                salas_preferenciais = [s for s in salas_compativeis
-                                       if s['bloco'] == elemento['bloco_preferencial']]
+            salas_compativeis = self._salas_livres(
+                individuo, elemento['horario'], elemento['tipo'], elemento['num_alunos'])
+
+            if len(salas_compativeis):
+                salas_preferenciais = salas_compativeis[
+                    self.bloco_salas_codigo[salas_compativeis] ==
+                    self.codigo_bloco.get(elemento['bloco_preferencial'], -1)]
 
                 sala_escolhida = random.choice(
-                    salas_preferenciais if salas_preferenciais else salas_compativeis)
-                individuo[elemento['id_elemento']
-                          ] = sala_escolhida['id_elemento']
-                salas_ocupadas_por_horario[horario].add(
-                    sala_escolhida['id_elemento'])
+                    salas_preferenciais if len(salas_preferenciais) else salas_compativeis)
+                self.atribuir_sala(individuo, elemento['indice'], int(sala_escolhida))
 
         for elemento in self.elementos_turma:
-            if elemento['id_elemento'] not in individuo:
-                horario = elemento['horario']
-                salas_compativeis = [
-                    s for s in self.elementos_sala
-                    if s['horario'] == horario
-                    and (s['tipo'] == elemento['tipo'] or
-                         (s['tipo'] == 'regular' and elemento['tipo'] == 'regular'))
-                    and s['id_elemento'] not in salas_ocupadas_por_horario[horario]
-                    and s['capacidade'] >= elemento['num_alunos']
-                ]
-
-                if salas_compativeis:
+            if individuo.genoma[elemento['indice']] == SEM_SALA:
+                salas_compativeis = self._salas_livres(
+                    individuo, elemento['horario'], elemento['tipo'], elemento['num_alunos'])
+
+                if len(salas_compativeis):
                     sala_escolhida = random.choice(salas_compativeis)
-                    individuo[elemento['id_elemento']
-                              ] = sala_escolhida['id_elemento']
-                    salas_ocupadas_por_horario[horario].add(
-                        sala_escolhida['id_elemento'])
-                else:
-                    individuo[elemento['id_elemento']] = None
+                    self.atribuir_sala(
+                        individuo, elemento['indice'], int(sala_escolhida))
 
         return individuo
 
-    def inicializar_populacao(self):
-        for _ in range(self.parametros['tamanho_populacao']):
-            individuo = self.criar_individuo_aleatorio()
-            self.populacao.append(individuo)
+    def _escolher_livres(self, rng, disponiveis):
+        # Sorteia, em cada linha, uma coluna uniforme entre as disponíveis
+        quantidades = disponiveis.sum(axis=1)
+        sorteio = (rng.random(len(disponiveis)) * quantidades).astype(np.intp)
+        escolhas = (np.cumsum(disponiveis, axis=1) > sorteio[:, None]).argmax(axis=1)
+        return escolhas, quantidades > 0
+
+    def _criar_genomas_lote(self, semente, quantidade):
+        # Mesma construção de criar_individuo_aleatorio (passo com bloco
+        # preferencial e passo de completamento), feita para todo o lote de
+        # uma vez, um horário por vez
+        if self.plano_inicializacao is None:
+            self._preparar_estruturas_inicializacao()
+        rng = np.random.default_rng(semente)
+        genomas = np.full((quantidade, self.num_genes), SEM_SALA, dtype=np.int32)
+        linhas = np.arange(quantidade)
+
+        for salas_horario, passos in self.plano_inicializacao:
+            ocupacao = np.full((quantidade, len(salas_horario)), SALA_LIVRE, dtype=np.int32)
+            anteriores_gene = np.empty(quantidade, dtype=np.int32)
+
+            for gene, locais, blocos, bloco_preferencial in passos:
+                livres = ocupacao[:, locais] == SALA_LIVRE
+                disponiveis = livres & (blocos == bloco_preferencial)
+                sem_preferencial = ~disponiveis.any(axis=1)
+                disponiveis[sem_preferencial] = livres[sem_preferencial]
+                escolhas, validas = self._escolher_livres(rng, disponiveis)
+
+                # Elementos repetidos da mesma turma realocam o gene e liberam
+                # a sala anterior, como em atribuir_sala
+                anteriores_gene[:] = genomas[:, gene]
+                anteriores = validas & (anteriores_gene != SEM_SALA)
+                ocupacao[linhas[anteriores], np.searchsorted(
+                    salas_horario, anteriores_gene[anteriores])] = SALA_LIVRE
+                colunas = locais[escolhas[validas]]
+                ocupacao[linhas[validas], colunas] = gene
+                genomas[linhas[validas], gene] = salas_horario[colunas]
+
+            for gene, locais, _, _ in passos:
+                pendentes = linhas[genomas[:, gene] == SEM_SALA]
+                if not len(pendentes):
+                    continue
+                disponiveis = ocupacao[pendentes[:, None], locais] == SALA_LIVRE
+                escolhas, validas = self._escolher_livres(rng, disponiveis)
+                colunas = locais[escolhas[validas]]
+                ocupacao[pendentes[validas], colunas] = gene
+                genomas[pendentes[validas], gene] = salas_horario[colunas]
+
+        return genomas
+
+    def _preparar_problemas_atribuicao(self):
+        # Um problema de atribuição por horário: genes (linhas) x elementos de
+        # sala do horário (colunas), com o custo de capacidade + bloco de
+        # calcular_fitness_elemento. Pares de tipos diferentes, ou mais caros
+        # que deixar o elemento sem sala, ficam proibidos (np.inf); o custo de
+        # não alocar entra como colunas fictícias
+        genes_por_horario = defaultdict(dict)
+        for elemento in self.elementos_turma:
+            genes_por_horario[elemento['horario']][elemento['indice']] = elemento['tipo']
+        salas_por_horario = defaultdict(list)
+        for sala in self.elementos_sala_por_indice:
+            salas_por_horario[sala['horario']].append(sala['indice'])
+        tipos_salas = np.array([s['tipo'] for s in self.elementos_sala_por_indice], dtype=object)
+
+        self.problemas_atribuicao = []
+        for horario, tipos_genes in genes_por_horario.items():
+            genes = np.array(list(tipos_genes), dtype=np.intp)
+            salas = np.array(salas_por_horario.get(horario, []), dtype=np.intp)
+            multiplicidade = self.multiplicidade_genes[genes][:, None]
+            custo_vazio = 10000.0 * multiplicidade
+
+            custos = multiplicidade * (
+                self.tabela_custo_capacidade.ravel()[
+                    self.linha_capacidade_genes[genes][:, None] + self.coluna_capacidade_salas[salas]] +
+                self.tabela_custo_bloco.ravel()[
+                    self.linha_bloco_genes[genes][:, None] + self.coluna_bloco_salas[salas]])
+            tipos = np.array(list(tipos_genes.values()), dtype=object)
+            custos[(tipos[:, None] != tipos_salas[salas]) | (custos >= custo_vazio)] = np.inf
+            vazios = np.repeat(custo_vazio, len(genes), axis=1)
+            self.problemas_atribuicao.append((genes, salas, custos, vazios))
+
+    def _criar_genomas_atribuicao(self, semente, quantidade, incluir_otima=True):
+        # A primeira solução é a atribuição ótima de cada horário; as demais
+        # resolvem os mesmos problemas com os custos perturbados por um ruído
+        # multiplicativo, gerando variantes próximas do ótimo
+        if self.problemas_atribuicao is None:
+            self._preparar_problemas_atribuicao()
+        rng = np.random.default_rng(semente)
+        ruido = self.parametros.get('ruido_atribuicao', 0.5)
+        genomas = np.full((quantidade, self.num_genes), SEM_SALA, dtype=np.int32)
+
+        for genes, salas, custos, vazios in self.problemas_atribuicao:
+            for k in range(quantidade):
+                perturbados = custos
+                if k or not incluir_otima:
+                    perturbados = custos * (1 + ruido * rng.random(custos.shape))
+                colunas = atribuicao_minima(np.hstack([perturbados, vazios]))
+                alocados = colunas < len(salas)
+                genomas[k, genes[alocados]] = salas[colunas[alocados]]
+        return genomas
+
+    def inicializar_populacao(self, pool=None):
+        # Lotes de tamanho fixo com sementes sorteadas do gerador principal: a
+        # população é a mesma com ou sem pool, para qualquer número de workers.
+        # Com proporcao_atribuicao, essa fração da população vem das
+        # atribuições de custo mínimo por horário
+        quantidade = self.parametros['tamanho_populacao']
+        num_atribuicao = min(quantidade, int(round(
+            self.parametros.get('proporcao_atribuicao', 0) * quantidade)))
+        lotes = []
+        for inicio in range(0, num_atribuicao, TAMANHO_LOTE_ATRIBUICAO):
+            tamanho = min(num_atribuicao - inicio, TAMANHO_LOTE_ATRIBUICAO)
+            lotes.append((self._criar_genomas_atribuicao, _criar_individuos_atribuicao_trabalhador,
+                          (random.getrandbits(63), tamanho, inicio == 0)))
+        quantidade -= num_atribuicao
+        while quantidade > 0:
+            tamanho = min(quantidade, TAMANHO_LOTE_INICIALIZACAO)
+            lotes.append((self._criar_genomas_lote, _criar_individuos_trabalhador,
+                          (random.getrandbits(63), tamanho)))
+            quantidade -= tamanho
+
+        if pool is None:
+            blocos_genomas = [criar(*argumentos) for criar, _, argumentos in lotes]
+        else:
+            tarefas = [pool.apply_async(trabalhador, argumentos)
+                       for _, trabalhador, argumentos in lotes]
+            blocos_genomas = [
+                np.frombuffer(tarefa.get(), dtype=np.int32).reshape(-1, self.num_genes)
+                for tarefa in tarefas]
+
+        for genomas in blocos_genomas:
+            for genoma in genomas:
+                self.populacao.append(Individuo(genoma.copy()))
+
+    def hash_individuo(self, individuo):
+        if individuo.hash_zobrist is None:
+            genes = np.arange(self.num_genes, dtype=np.uint64)
+            valores = _misturar_64_vetor(
+                genes * np.uint64(self.num_salas_hash) + (individuo.genoma + 1).astype(np.uint64))
+            individuo.hash_zobrist = int(np.bitwise_xor.reduce(valores)) if len(valores) else 0
+        return individuo.hash_zobrist
+
+    def _valor_zobrist(self, gene, indice_sala):
+        return _misturar_64(gene * self.num_salas_hash + indice_sala + 1)
 
     def calcular_fitness(self, individuo, use_cache=True):
-        cache_key = str(individuo)
-        if use_cache and cache_key in self.fitness_cache:
-            return self.fitness_cache[cache_key]
+        cache_key = self.hash_individuo(individuo)
+        if use_cache:
+            resultado = self.fitness_cache.obter(cache_key)
+            if resultado is not None:
+                return resultado
 
         fitness_total = 0
         problemas_tamanho = 0
         problemas_bloco = 0
 
+        genoma = individuo.genoma
+        salas_distintas_por_turma = {}
         for elemento_turma in self.elementos_turma:
-            id_elemento = elemento_turma['id_elemento']
-            if id_elemento not in individuo or individuo[id_elemento] is None:
+            indice_sala = genoma[elemento_turma['indice']]
+            if indice_sala == SEM_SALA:
                 fitness_total += 10000
                 continue
 
-            id_sala_elemento = individuo[id_elemento]
-            sala = next(
-                (s for s in self.elementos_sala if s['id_elemento'] == id_sala_elemento), None)
-
-            if not sala:
-                fitness_total += 10000
-                continue
+            sala = self.elementos_sala_por_indice[indice_sala]
 
             T = elemento_turma['num_alunos']
             C = sala['capacidade']
@@ -189,13 +1013,17 @@ class AlocacaoTurmasAG:
                     problemas_bloco += 1
 
             # Mesma sala para diferentes horários
-            salas_turma = []
-            for elemento in self.elementos_por_turma[elemento_turma['id_turma']]:
-                if elemento['id_elemento'] in individuo and individuo[elemento['id_elemento']]:
-                    sala_id = individuo[elemento['id_elemento']].split('_')[0]
-                    salas_turma.append(sala_id)
-
-            fitness_total += len(set(salas_turma))
+            id_turma = elemento_turma['id_turma']
+            if id_turma not in salas_distintas_por_turma:
+                salas_turma = []
+                for elemento in self.elementos_por_turma[id_turma]:
+                    indice_outra = genoma[elemento['indice']]
+                    if indice_outra != SEM_SALA:
+                        sala_id = self.elementos_sala_por_indice[indice_outra]['id_elemento'].split('_')[0]
+                        salas_turma.append(sala_id)
+                salas_distintas_por_turma[id_turma] = len(set(salas_turma))
+
+            fitness_total += salas_distintas_por_turma[id_turma]
 
         resultado = {
             'fitness_total': fitness_total,
@@ -203,25 +1031,270 @@ class AlocacaoTurmasAG:
             'problemas_bloco': problemas_bloco
         }
 
-        self.fitness_cache[cache_key] = resultado
+        self.fitness_cache.guardar(cache_key, resultado)
         return resultado
 
+    def calcular_fitness_lote(self, individuos, use_cache=True):
+        num_individuos = len(individuos)
+        fitness_total = np.zeros(num_individuos)
+        problemas_tamanho = np.zeros(num_individuos, dtype=np.int64)
+        problemas_bloco = np.zeros(num_individuos, dtype=np.int64)
+
+        chaves = [self.hash_individuo(ind) for ind in individuos]
+        pendentes = []
+        for i, chave in enumerate(chaves):
+            if individuos[i].estado is not None:
+                resultado = self._resultado_estado(individuos[i].estado)
+            else:
+                resultado = self.fitness_cache.obter(
+                    chave) if use_cache else None
+            if resultado is None:
+                pendentes.append(i)
+            else:
+                fitness_total[i] = resultado['fitness_total']
+                problemas_tamanho[i] = resultado['problemas_tamanho']
+                problemas_bloco[i] = resultado['problemas_bloco']
+
+        for inicio in range(0, len(pendentes), TAMANHO_LOTE_FITNESS):
+            lote = pendentes[inicio:inicio + TAMANHO_LOTE_FITNESS]
+            genomas = np.stack([individuos[i].genoma for i in lote])
+            total, tamanho, bloco = self._calcular_fitness_matriz(genomas)
+            fitness_total[lote] = total
+            problemas_tamanho[lote] = tamanho
+            problemas_bloco[lote] = bloco
+            for i, f, t, b in zip(lote, total.tolist(), tamanho.tolist(), bloco.tolist()):
+                self.fitness_cache.guardar(chaves[i], {
+                    'fitness_total': f,
+                    'problemas_tamanho': t,
+                    'problemas_bloco': b
+                })
+
+        return {
+            'fitness_total': fitness_total,
+            'problemas_tamanho': problemas_tamanho,
+            'problemas_bloco': problemas_bloco
+        }
+
+    def _calcular_fitness_matriz(self, genomas):
+        # Trabalha com a população nas colunas (elementos x indivíduos), para
+        # que cada operação percorra vetores contíguos de indivíduos
+        num_individuos = genomas.shape[0]
+        genomas_t = np.ascontiguousarray(genomas.T)
+        salas = np.take(genomas_t, self.genes_elementos, axis=0)
+        alocado = salas != SEM_SALA
+
+        posicao_capacidade = self.linha_capacidade_elementos + \
+            np.take(self.coluna_capacidade_salas, salas)
+        posicao_bloco = self.linha_bloco_elementos + \
+            np.take(self.coluna_bloco_salas, salas)
+
+        # Salas distintas por turma: compara as chaves de sala de cada grupo
+        # turma -> genes com as anteriores do mesmo grupo
+        chaves = np.empty((self.num_genes + 1, num_individuos), dtype=np.int32)
+        chaves[:-1] = np.take(self.chave_salas, genomas_t)
+        chaves[-1] = -1
+        colunas = [np.take(chaves, self.genes_por_turma_grupo[:, k], axis=0)
+                   for k in range(self.genes_por_turma_grupo.shape[1])]
+        distintas_turma = np.zeros(
+            (len(self.genes_por_turma_grupo), num_individuos), dtype=np.int64)
+        for k, coluna in enumerate(colunas):
+            nova = coluna != -1
+            for anterior in colunas[:k]:
+                nova &= coluna != anterior
+            distintas_turma += nova
+
+        # Parcelas na mesma ordem em que calcular_fitness as acumula. Com mais
+        # de um indivíduo, a redução ao longo do eixo 0 soma linha a linha (a
+        # soma pairwise do NumPy só se aplica ao eixo interno), reproduzindo
+        # exatamente a soma sequencial da versão escalar; com uma única coluna
+        # o eixo 0 passa a ser o interno, então usa-se o cumsum
+        parcelas = np.empty((len(salas), 3, num_individuos))
+        parcelas[:, 0] = np.take(self.tabela_custo_capacidade, posicao_capacidade)
+        parcelas[:, 1] = np.take(self.tabela_custo_bloco, posicao_bloco)
+        parcelas[:, 2] = np.take(
+            distintas_turma, self.turma_elementos, axis=0) * alocado
+        linhas = parcelas.reshape(-1, num_individuos)
+        if num_individuos > 1 or not len(linhas):
+            fitness_total = np.add.reduce(linhas, axis=0)
+        else:
+            fitness_total = np.cumsum(linhas, axis=0)[-1]
+
+        problemas_tamanho = np.count_nonzero(
+            np.take(self.tabela_problema_tamanho, posicao_capacidade), axis=0)
+        problemas_bloco = np.count_nonzero(
+            np.take(self.tabela_problema_bloco, posicao_bloco), axis=0)
+        return fitness_total, problemas_tamanho, problemas_bloco
+
+    def avaliar_incremental(self, individuo):
+        genoma = individuo.genoma
+        posicao_capacidade = self.linha_capacidade_genes + \
+            np.take(self.coluna_capacidade_salas, genoma)
+        posicao_bloco = self.linha_bloco_genes + \
+            np.take(self.coluna_bloco_salas, genoma)
+
+        estado = EstadoFitness()
+        estado.custo_gene = self.multiplicidade_genes * (
+            np.take(self.tabela_custo_capacidade, posicao_capacidade) +
+            np.take(self.tabela_custo_bloco, posicao_bloco))
+        estado.tamanho_gene = self.multiplicidade_genes * \
+            np.take(self.tabela_problema_tamanho, posicao_capacidade)
+        estado.bloco_gene = self.multiplicidade_genes * \
+            np.take(self.tabela_problema_bloco, posicao_bloco)
+        estado.chaves_turma = [{} for _ in range(len(self.genes_por_turma_grupo))]
+        estado.alocados_turma = [0] * len(self.genes_por_turma_grupo)
+
+        chaves = np.take(self.chave_salas, genoma).tolist()
+        for gene in np.flatnonzero(genoma != SEM_SALA).tolist():
+            turma = self.turma_genes[gene]
+            chaves_turma = estado.chaves_turma[turma]
+            chaves_turma[chaves[gene]] = chaves_turma.get(chaves[gene], 0) + 1
+            estado.alocados_turma[turma] += self._multiplicidade_genes[gene]
+
+        estado.fitness_total = float(estado.custo_gene.sum()) + sum(
+            len(c) * a for c, a in zip(estado.chaves_turma, estado.alocados_turma))
+        estado.problemas_tamanho = int(estado.tamanho_gene.sum())
+        estado.problemas_bloco = int(estado.bloco_gene.sum())
+
+        individuo.estado = estado
+        if self.parametros.get('verificar_fitness_incremental', False):
+            self._verificar_estado(individuo)
+        return self._resultado_estado(estado)
+
+    def atribuir_sala(self, individuo, gene, indice_sala):
+        anterior = int(individuo.genoma[gene])
+        individuo.genoma[gene] = indice_sala
+        if anterior == indice_sala:
+            return
+        if individuo.hash_zobrist is not None:
+            individuo.hash_zobrist ^= (self._valor_zobrist(gene, anterior) ^
+                                       self._valor_zobrist(gene, indice_sala))
+        ocupacao = individuo.ocupacao
+        if ocupacao is not None:
+            if anterior != SEM_SALA and ocupacao[anterior] == gene:
+                ocupacao[anterior] = SALA_LIVRE
+            if indice_sala != SEM_SALA:
+                ocupacao[indice_sala] = gene
+        estado = individuo.estado
+        if estado is None:
+            return
+
+        multiplicidade = self._multiplicidade_genes[gene]
+        posicao_capacidade = self._linha_capacidade_genes[gene] + \
+            self._coluna_capacidade_salas[indice_sala]
+        posicao_bloco = self._linha_bloco_genes[gene] + \
+            self._coluna_bloco_salas[indice_sala]
+        custo = multiplicidade * (self._custo_capacidade[posicao_capacidade] +
+                                  self._custo_bloco[posicao_bloco])
+        tamanho = multiplicidade * self._problema_tamanho[posicao_capacidade]
+        bloco = multiplicidade * self._problema_bloco[posicao_bloco]
+
+        delta = custo - float(estado.custo_gene[gene])
+        estado.problemas_tamanho += tamanho - int(estado.tamanho_gene[gene])
+        estado.problemas_bloco += bloco - int(estado.bloco_gene[gene])
+        estado.custo_gene[gene] = custo
+        estado.tamanho_gene[gene] = tamanho
+        estado.bloco_gene[gene] = bloco
+
+        turma = self.turma_genes[gene]
+        chaves = estado.chaves_turma[turma]
+        custo_turma = len(chaves) * estado.alocados_turma[turma]
+        if anterior != SEM_SALA:
+            chave = self._chave_salas[anterior]
+            if chaves[chave] == 1:
+                del chaves[chave]
+            else:
+                chaves[chave] -= 1
+            estado.alocados_turma[turma] -= multiplicidade
+        if indice_sala != SEM_SALA:
+            chave = self._chave_salas[indice_sala]
+            chaves[chave] = chaves.get(chave, 0) + 1
+            estado.alocados_turma[turma] += multiplicidade
+        delta += len(chaves) * estado.alocados_turma[turma] - custo_turma
+
+        estado.fitness_total += delta
+
+    def _resultado_estado(self, estado):
+        return {
+            'fitness_total': estado.fitness_total,
+            'problemas_tamanho': estado.problemas_tamanho,
+            'problemas_bloco': estado.problemas_bloco
+        }
+
+    def _verificar_estado(self, individuo):
+        esperado = self.calcular_fitness(individuo, use_cache=False)
+        obtido = self._resultado_estado(individuo.estado)
+        if (not math.isclose(obtido['fitness_total'], esperado['fitness_total'], rel_tol=1e-9)
+                or obtido['problemas_tamanho'] != esperado['problemas_tamanho']
+                or obtido['problemas_bloco'] != esperado['problemas_bloco']):
+            raise RuntimeError(
+                f"Fitness incremental divergente: {obtido} != {esperado}")
+
+    def serializar_individuos(self, individuos):
+        # Forma compacta para enviar indivíduos entre processos: os genomas
+        # int32 concatenados em bytes
+        if not individuos:
+            return b''
+        return np.stack([ind.genoma for ind in individuos]).astype(np.int32).tobytes()
+
+    def desserializar_individuos(self, dados):
+        genomas = np.frombuffer(dados, dtype=np.int32).reshape(-1, self.num_genes)
+        return [Individuo(genoma.copy()) for genoma in genomas]
+
+    def _indice_valido(self):
+        indice = self.indice_populacao
+        return indice is not None and indice.valido_para(self.populacao)
+
+    def _indice_atualizado(self):
+        if not self._indice_valido():
+            fitness = self.calcular_fitness_lote(self.populacao)['fitness_total']
+            hashes = ([self.hash_individuo(ind) for ind in self.populacao]
+                      if self.parametros.get('rejeitar_duplicados', False) else None)
+            self.indice_populacao = IndicePopulacao(self.populacao, fitness, hashes)
+        return self.indice_populacao
+
+    def populacao_ordenada(self):
+        if not self._indice_valido():
+            return list(self.populacao)
+        return [self.populacao[i] for i in self.indice_populacao.ordem()]
+
+    def _melhor_individuo(self):
+        if self._indice_valido():
+            return self.populacao[self.indice_populacao.melhores[0]]
+        fitness = self.calcular_fitness_lote(self.populacao)['fitness_total']
+        return self.populacao[int(np.argmin(fitness))]
+
     def selecionar_pais(self):
-        torneio = [(ind, self.calcular_fitness(ind)['fitness_total'])
-                   for ind in self.populacao]
+        # Antes da primeira substituição a população está na ordem de criação;
+        # depois, os dois primeiros da ordem por fitness
+        if self._indice_valido():
+            melhores = self.indice_populacao.melhores
+            return self.populacao[melhores[0]], self.populacao[melhores[1]]
+        torneio = self.populacao
         #torneio_ordenado = sorted(torneio_com_fitness, key=lambda x: x[1]) #Escolhe pais com melhor fitness, no artigo seleciona aleatório
-        return torneio[0][0], torneio[1][0]
+        return torneio[0], torneio[1]
 
     
+    def _sortear_pares(self, fitness, num_pares):
+        selecao = self.parametros['selecao']
+        argumentos = {
+            'torneio': {'tamanho_torneio': self.parametros.get('tamanho_torneio', 2)},
+            'ranking': {'pressao': self.parametros.get('pressao_ranking', 1.5)}
+        }.get(selecao, {})
+        rng = np.random.default_rng(random.getrandbits(63))
+        return OPERADORES_SELECAO[selecao](fitness, num_pares, rng, **argumentos)
+
+    def selecionar_pares(self, num_pares):
+        # Pares de pais de todos os filhos do lote, sorteados de uma vez pelo
+        # operador de seleção sobre o vetor de fitness do índice da população
+        posicoes = self._sortear_pares(self._indice_atualizado().fitness, num_pares)
+        return [(self.populacao[i], self.populacao[j]) for i, j in posicoes.tolist()]
+
     def calcular_fitness_elemento_pai(self, pai, elemento_id):
-        if elemento_id not in pai or not pai[elemento_id]:
-            return float('inf')
-            
-        elemento_turma = next((t for t in self.elementos_turma if t['id_elemento'] == elemento_id), None)
-        sala = next((s for s in self.elementos_sala if s['id_elemento'] == pai[elemento_id]), None)
-        
-        if not elemento_turma or not sala:
+        elemento_turma = self.elemento_turma_por_id.get(elemento_id)
+        if not elemento_turma or pai.genoma[elemento_turma['indice']] == SEM_SALA:
             return float('inf')
+
+        sala = self.elementos_sala_por_indice[pai.genoma[elemento_turma['indice']]]
             
         return self.calcular_fitness_elemento(
             elemento_turma['num_alunos'],
@@ -231,23 +1304,25 @@ class AlocacaoTurmasAG:
         )
 
     def crossover(self, pai1, pai2):
-        filho = {}
-        salas_alocadas_por_horario = defaultdict(set)
+        filho = Individuo(self.novo_genoma(), ocupacao=self.nova_ocupacao())
 
         elementos_restantes = [e['id_elemento'] for e in self.elementos_turma
-                               if e['id_elemento'] not in filho]
+                               if filho.genoma[e['indice']] == SEM_SALA]
 
         taxa = min(self.parametros['taxa_crossover'], len(elementos_restantes))
 
         for elemento_id in random.sample(elementos_restantes, taxa):
-            horario_elemento = next(e['horario'] for e in self.elementos_turma
-                                    if e['id_elemento'] == elemento_id)
+            gene = self.indice_turma[elemento_id]
+            sala_pai1 = int(pai1.genoma[gene])
+            sala_pai2 = int(pai2.genoma[gene])
 
-            pai1_valido = (elemento_id in pai1 and pai1[elemento_id] and
-                           pai1[elemento_id] not in salas_alocadas_por_horario[horario_elemento])
+            # O elemento de sala já identifica o horário; basta consultar a
+            # ocupação do filho
+            pai1_valido = (sala_pai1 != SEM_SALA and
+                           self.verificar_disponibilidade_sala(filho, sala_pai1))
 
-            pai2_valido = (elemento_id in pai2 and pai2[elemento_id] and
-                           pai2[elemento_id] not in salas_alocadas_por_horario[horario_elemento])
+            pai2_valido = (sala_pai2 != SEM_SALA and
+                           self.verificar_disponibilidade_sala(filho, sala_pai2))
 
             if pai1_valido and pai2_valido:
                 fitness_pai1 = self.calcular_fitness_elemento_pai(
@@ -256,15 +1331,11 @@ class AlocacaoTurmasAG:
                     pai2, elemento_id)
 
                 if fitness_pai1 <= fitness_pai2:
-                    filho[elemento_id] = pai1[elemento_id]
-                    salas_alocadas_por_horario[horario_elemento].add(
-                        pai1[elemento_id])
+                    self.atribuir_sala(filho, gene, sala_pai1)
                 else:
-                    filho[elemento_id] = pai2[elemento_id]
-                    salas_alocadas_por_horario[horario_elemento].add(
-                        pai2[elemento_id])
+                    self.atribuir_sala(filho, gene, sala_pai2)
             else:
-                filho[elemento_id] = None
+                self.atribuir_sala(filho, gene, SEM_SALA)
 
         return filho
 
@@ -289,39 +1360,44 @@ class AlocacaoTurmasAG:
     def mutacao(self, individuo):
         turmas_nao_alocadas = [
             elemento for elemento in self.elementos_turma
-            if individuo.get(elemento['id_elemento']) is None
+            if individuo.genoma[elemento['indice']] == SEM_SALA
         ]
 
         for elemento_turma in turmas_nao_alocadas:
-            sala_alocada = None
-            criterios = [
-                self._mutacao_criterio_1,
-                self._mutacao_criterio_2,
-                self._mutacao_criterio_3,
-                self._mutacao_criterio_4,
-                self._mutacao_criterio_5
-            ]
-
-            for criterio in criterios:
-                sala_alocada = criterio(individuo, elemento_turma)
-                if sala_alocada:
-                    individuo[elemento_turma['id_elemento']
-                              ] = sala_alocada['id_elemento']
-                    break
+            self._realocar_elemento(individuo, elemento_turma)
+
+        if individuo.estado is not None and self.parametros.get('verificar_fitness_incremental', False):
+            self._verificar_estado(individuo)
 
         return individuo
 
+    def _realocar_elemento(self, individuo, elemento_turma):
+        criterios = [
+            self._mutacao_criterio_1,
+            self._mutacao_criterio_2,
+            self._mutacao_criterio_3,
+            self._mutacao_criterio_4,
+            self._mutacao_criterio_5
+        ]
+
+        for criterio in criterios:
+            sala_alocada = criterio(individuo, elemento_turma)
+            if sala_alocada:
+                self.atribuir_sala(
+                    individuo, elemento_turma['indice'], sala_alocada['indice'])
+                return True
+        return False
+
     def _mutacao_criterio_1(self, individuo, elemento_turma):
         for elemento in self.elementos_por_turma[elemento_turma['id_turma']]:
-            if elemento['id_elemento'] in individuo and individuo[elemento['id_elemento']]:
-                sala_outra = next((s for s in self.elementos_sala
-                                   if s['id_elemento'] == individuo[elemento['id_elemento']]), None)
+            indice_outra = individuo.genoma[elemento['indice']]
+            if indice_outra != SEM_SALA:
+                sala_outra = self.elementos_sala_por_indice[indice_outra]
                 if sala_outra:
                     id_sala_elemento = f"{sala_outra['id_sala']}_{elemento_turma['horario']}"
-                    sala = next((s for s in self.elementos_sala
-                                 if s['id_elemento'] == id_sala_elemento), None)
+                    sala = self.elemento_sala_por_id.get(id_sala_elemento)
                     if (sala and sala['tipo'] == elemento_turma['tipo'] and
-                            self.verificar_disponibilidade_sala(individuo, sala['id_elemento'])):
+                            self.verificar_disponibilidade_sala(individuo, sala['indice'])):
                         return sala
         return None
 
@@ -329,64 +1405,177 @@ class AlocacaoTurmasAG:
         if not elemento_turma['bloco_preferencial']:
             return None
 
-        salas = [s for s in self.elementos_sala
-                 if s['bloco'] == elemento_turma['bloco_preferencial'] and
-                 s['horario'] == elemento_turma['horario'] and
-                 s['tipo'] == elemento_turma['tipo'] and
-                 s['capacidade'] >= elemento_turma['num_alunos'] and
-                 s['capacidade'] <= 1.15 * elemento_turma['num_alunos'] and
-                 self.verificar_disponibilidade_sala(individuo, s['id_elemento'])]
+        salas = self._salas_livres(
+            individuo, elemento_turma['horario'], elemento_turma['tipo'],
+            elemento_turma['num_alunos'], 1.15 * elemento_turma['num_alunos'],
+            bloco=elemento_turma['bloco_preferencial'])
 
-        return random.choice(salas) if salas else None
+        return self.elementos_sala_por_indice[random.choice(salas)] if len(salas) else None
 
     def _mutacao_criterio_3(self, individuo, elemento_turma):
-        salas = [s for s in self.elementos_sala
-                 if s['horario'] == elemento_turma['horario'] and
-                 s['tipo'] == elemento_turma['tipo'] and
-                 s['capacidade'] >= elemento_turma['num_alunos'] and
-                 s['capacidade'] <= 1.35 * elemento_turma['num_alunos'] and
-                 self.verificar_disponibilidade_sala(individuo, s['id_elemento'])]
+        salas = self._salas_livres(
+            individuo, elemento_turma['horario'], elemento_turma['tipo'],
+            elemento_turma['num_alunos'], 1.35 * elemento_turma['num_alunos'])
 
-        return random.choice(salas) if salas else None
+        return self.elementos_sala_por_indice[random.choice(salas)] if len(salas) else None
 
     def _mutacao_criterio_4(self, individuo, elemento_turma):
         if not elemento_turma['bloco_preferencial']:
             return None
 
-        salas = [s for s in self.elementos_sala
-                 if s['bloco'] == elemento_turma['bloco_preferencial'] and
-                 s['horario'] == elemento_turma['horario'] and
-                 s['tipo'] == elemento_turma['tipo'] and
-                 s['capacidade'] >= elemento_turma['num_alunos'] and
-                 self.verificar_disponibilidade_sala(individuo, s['id_elemento'])]
+        salas = self._salas_livres(
+            individuo, elemento_turma['horario'], elemento_turma['tipo'],
+            elemento_turma['num_alunos'], bloco=elemento_turma['bloco_preferencial'])
 
-        return random.choice(salas) if salas else None
+        return self.elementos_sala_por_indice[random.choice(salas)] if len(salas) else None
 
     def _mutacao_criterio_5(self, individuo, elemento_turma):
-        salas = [s for s in self.elementos_sala
-                 if s['horario'] == elemento_turma['horario'] and
-                 s['tipo'] == elemento_turma['tipo'] and
-                 s['capacidade'] >= elemento_turma['num_alunos'] and
-                 self.verificar_disponibilidade_sala(individuo, s['id_elemento'])]
+        salas = self._salas_livres(
+            individuo, elemento_turma['horario'], elemento_turma['tipo'],
+            elemento_turma['num_alunos'])
 
-        return random.choice(salas) if salas else None
+        return self.elementos_sala_por_indice[random.choice(salas)] if len(salas) else None
 
-    def verificar_disponibilidade_sala(self, individuo, id_sala_elemento):
-        return not any(value == id_sala_elemento for value in individuo.values())
+    def _preparar_busca_local(self):
+        # As listas de candidatos de cada gene são montadas sob demanda; os
+        # tipos servem para validar as trocas
+        self.candidatos_busca_local = [None] * self.num_genes
+        self._tipo_genes = [None] * self.num_genes
+        for elemento in self.elementos_turma:
+            self._tipo_genes[elemento['indice']] = elemento['tipo']
+        self._tipo_salas = [sala['tipo'] for sala in self.elementos_sala_por_indice]
+
+    def _candidatos_gene(self, gene):
+        # As salas do horário e tipo do gene em ordem de custo (capacidade +
+        # bloco, desempate pelo índice), limitadas às candidatos_busca_local
+        # melhores e sem as que custam mais que deixar o gene sem sala
+        elemento = self.elemento_turma_por_id[self.ids_turma[gene]]
+        salas = self.indices_por_horario_tipo.get(
+            (elemento['horario'], elemento['tipo']), np.empty(0, dtype=np.int32))
+        multiplicidade = self.multiplicidade_genes[gene]
+        custos = multiplicidade * (
+            self.tabela_custo_capacidade.ravel()[
+                self.linha_capacidade_genes[gene] + self.coluna_capacidade_salas[salas]] +
+            self.tabela_custo_bloco.ravel()[
+                self.linha_bloco_genes[gene] + self.coluna_bloco_salas[salas]])
+        validas = custos < 10000.0 * multiplicidade
+        salas, custos = salas[validas], custos[validas]
+        ordem = np.lexsort((salas, custos))[:self.parametros.get('candidatos_busca_local', 10)]
+        candidatos = salas[ordem].tolist()
+        self.candidatos_busca_local[gene] = candidatos
+        return candidatos
+
+    def _delta_atribuicao(self, estado, gene, anterior, indice_sala):
+        # Variação do fitness se o gene passasse de anterior para indice_sala,
+        # calculada das contribuições do estado sem alterá-lo
+        multiplicidade = self._multiplicidade_genes[gene]
+        custo = multiplicidade * (
+            self._custo_capacidade[self._linha_capacidade_genes[gene] +
+                                   self._coluna_capacidade_salas[indice_sala]] +
+            self._custo_bloco[self._linha_bloco_genes[gene] +
+                              self._coluna_bloco_salas[indice_sala]])
+        delta = custo - estado.custo_gene[gene]
+
+        turma = self.turma_genes[gene]
+        chaves = estado.chaves_turma[turma]
+        num_chaves = len(chaves)
+        alocados = estado.alocados_turma[turma]
+        custo_turma = num_chaves * alocados
+        chave_anterior = None
+        if anterior != SEM_SALA:
+            chave_anterior = self._chave_salas[anterior]
+            if chaves[chave_anterior] == 1:
+                num_chaves -= 1
+            alocados -= multiplicidade
+        if indice_sala != SEM_SALA:
+            chave = self._chave_salas[indice_sala]
+            if chave not in chaves or (chave == chave_anterior and chaves[chave] == 1):
+                num_chaves += 1
+            alocados += multiplicidade
+        return delta + num_chaves * alocados - custo_turma
+
+    def busca_local(self, individuo, max_movimentos=None, genes=None, tempo_maximo=None):
+        # Primeira melhoria sobre as listas de candidatos: move cada gene para
+        # uma sala candidata livre, ou troca com o ocupante dela, aceitando só
+        # movimentos que reduzem o fitness. O ganho de cada movimento vem das
+        # contribuições do estado em O(1); só os aceitos alteram o indivíduo.
+        # O tempo máximo é opcional: depende da máquina e da carga, então
+        # torna a execução não reprodutível pela semente
+        if self.candidatos_busca_local is None:
+            self._preparar_busca_local()
+        if individuo.estado is None:
+            self.avaliar_incremental(individuo)
+        if max_movimentos is None:
+            max_movimentos = self.parametros.get('max_movimentos_busca_local', MOVIMENTOS_BUSCA_LOCAL)
+        if tempo_maximo is None:
+            tempo_maximo = self.parametros.get('tempo_busca_local')
+        genoma = individuo.genoma
+        ocupacao = self.ocupacao_individuo(individuo)
+        estado = individuo.estado
+        candidatos = self.candidatos_busca_local
+        tipo_genes = self._tipo_genes
+        tipo_salas = self._tipo_salas
+        tolerancia = -1e-9 * max(1.0, abs(estado.fitness_total))
+
+        inicio = time.perf_counter()
+        limite = None if tempo_maximo is None else inicio + tempo_maximo
+        avaliados = aceitos = 0
+        genes = list(range(self.num_genes)) if genes is None else list(genes)
+        melhorou = True
+        while melhorou:
+            melhorou = False
+            random.shuffle(genes)
+            for posicao, gene in enumerate(genes):
+                # O relógio, se houver limite de tempo, é consultado a cada 64 genes
+                if avaliados >= max_movimentos or (
+                        limite is not None and posicao % 64 == 0 and time.perf_counter() > limite):
+                    melhorou = False
+                    break
+                atual = int(genoma[gene])
+                candidatos_gene = candidatos[gene]
+                if candidatos_gene is None:
+                    candidatos_gene = self._candidatos_gene(gene)
+                for sala in candidatos_gene:
+                    if sala == atual:
+                        continue
+                    ocupante = int(ocupacao[sala])
+                    if ocupante != SALA_LIVRE and (
+                            atual == SEM_SALA or tipo_salas[atual] != tipo_genes[ocupante]):
+                        continue
+                    avaliados += 1
+                    delta = self._delta_atribuicao(estado, gene, atual, sala)
+                    if ocupante != SALA_LIVRE:
+                        delta += self._delta_atribuicao(estado, ocupante, sala, atual)
+                    if delta < tolerancia:
+                        self.atribuir_sala(individuo, gene, sala)
+                        if ocupante != SALA_LIVRE:
+                            self.atribuir_sala(individuo, ocupante, atual)
+                        aceitos += 1
+                        melhorou = True
+                        break
+
+        estatisticas = self.estatisticas_busca_local
+        estatisticas['execucoes'] += 1
+        estatisticas['avaliados'] += avaliados
+        estatisticas['aceitos'] += aceitos
+        estatisticas['tempo'] += time.perf_counter() - inicio
+        if self.parametros.get('verificar_fitness_incremental', False):
+            self._verificar_estado(individuo)
+        return aceitos
+
+    def verificar_disponibilidade_sala(self, individuo, indice_sala):
+        return self.ocupacao_individuo(individuo)[indice_sala] == SALA_LIVRE
 
     def atualizar_taxa_evolucao(self):
-        melhor_individuo = min(
-            self.populacao, key=lambda x: self.calcular_fitness(x)['fitness_total'])
+        melhor_individuo = self._melhor_individuo()
 
         elementos_validos = 0
         for elemento_turma in self.elementos_turma:
-            id_elemento = elemento_turma['id_elemento']
-            if id_elemento not in melhor_individuo or melhor_individuo[id_elemento] is None:
+            indice_sala = melhor_individuo.genoma[elemento_turma['indice']]
+            if indice_sala == SEM_SALA:
                 continue
 
-            id_sala_elemento = melhor_individuo[id_elemento]
-            sala = next(
-                (s for s in self.elementos_sala if s['id_elemento'] == id_sala_elemento), None)
+            sala = self.elementos_sala_por_indice[indice_sala]
 
             if sala:
                 fitness_elemento = self.calcular_fitness_elemento(
@@ -412,74 +1601,525 @@ class AlocacaoTurmasAG:
             self.limite_insercao += max(1, int(self.contador_sem_evolucao / 2))
             self.contador_sem_evolucao = 0
 
-    def substituir_pior_individuo(self, novo_individuo):
-        if len(self.populacao) < self.parametros['tamanho_populacao']:
-            self.populacao.append(novo_individuo)
-            return
+    def gerar_filho(self, pai1, pai2):
+        filho = self.crossover(pai1, pai2)
+        filho = self.mutacao(filho)
+        # O filho do crossover tem quase todos os genes vazios, então uma
+        # avaliação completa vetorizada é mais barata aqui; a partir dela,
+        # alterações de k genes custam O(k)
+        if self.parametros.get('fitness_incremental', True):
+            self.avaliar_incremental(filho)
+        if self.parametros.get('busca_local') == 'filhos':
+            self.busca_local(filho)
+        return filho
 
-        candidatos = self.populacao + [novo_individuo]
-        candidatos_com_fitness = [(ind, self.calcular_fitness(
-            ind)['fitness_total']) for ind in candidatos]
+    def _copia_estatica(self, parametros=None):
+        # Compartilha dados e índices pré-processados, sem a população; com
+        # parametros, a cópia executa com eles e dimensiona o cache por eles
+        copia = copy.copy(self)
+        copia.populacao = []
+        copia.indice_populacao = None
+        copia.melhor_fitness_historico = []
+        if parametros is None:
+            copia.fitness_cache = CacheFitness(self.fitness_cache.tamanho_maximo)
+        else:
+            copia.parametros = parametros
+            copia.fitness_cache = CacheFitness(_tamanho_cache_fitness(parametros))
+        copia.estatisticas_busca_local = dict.fromkeys(self.estatisticas_busca_local, 0)
+        if self.instrumentacao is not None:
+            self.instrumentacao.remover(copia)
+            copia.instrumentacao = None
+        return copia
+
+    def criar_pool(self):
+        workers = self.parametros.get('workers', 1)
+        if workers <= 1:
+            return None
+        return multiprocessing.Pool(
+            workers, initializer=_iniciar_trabalhador, initargs=(self._copia_estatica(),))
+
+    def _gerar_filhos_paralelo(self, pool, num_filhos):
+        # Todos os filhos do lote partem da mesma população; cada tarefa recebe
+        # uma semente sorteada do gerador principal, o que torna o resultado
+        # reprodutível para um mesmo número de workers
+        populacao = self.populacao_ordenada()
+        fitness = self.calcular_fitness_lote(populacao)
+        genomas = np.stack([ind.genoma for ind in populacao])
+        hashes = [self.hash_individuo(ind) for ind in populacao]
+        resultados = [
+            {'fitness_total': float(f), 'problemas_tamanho': int(t), 'problemas_bloco': int(b)}
+            for f, t, b in zip(fitness['fitness_total'], fitness['problemas_tamanho'],
+                               fitness['problemas_bloco'])
+        ]
 
-        candidatos_ordenados = sorted(
-            candidatos_com_fitness, key=lambda x: x[1])
-        self.populacao = [
-            ind for ind, _ in candidatos_ordenados[:self.parametros['tamanho_populacao']]]
+        # Com um operador de seleção, os pares de todo o lote são sorteados
+        # aqui, como posições na população ordenada enviada aos workers
+        pares = None
+        if self.parametros.get('selecao', 'elitista') != 'elitista':
+            pares = self._sortear_pares(fitness['fitness_total'], num_filhos).tolist()
+
+        num_tarefas = min(self.parametros['workers'], num_filhos)
+        tarefas = []
+        inicio = 0
+        for i in range(num_tarefas):
+            filhos_tarefa = num_filhos // num_tarefas + \
+                (1 if i < num_filhos % num_tarefas else 0)
+            pares_tarefa = pares[inicio:inicio + filhos_tarefa] if pares is not None else None
+            inicio += filhos_tarefa
+            tarefas.append(pool.apply_async(_gerar_filhos_trabalhador, (
+                random.getrandbits(63), genomas, hashes, resultados, filhos_tarefa,
+                pares_tarefa, self.instrumentacao is not None)))
+
+        filhos = []
+        for tarefa in tarefas:
+            filhos_tarefa, estatisticas, fases = tarefa.get()
+            for chave, valor in estatisticas.items():
+                self.estatisticas_busca_local[chave] += valor
+            if fases is not None:
+                self.instrumentacao.acumular(*fases)
+            for genoma, hash_zobrist, resultado in filhos_tarefa:
+                filho = Individuo(genoma, hash_zobrist=hash_zobrist)
+                self.fitness_cache.guardar(hash_zobrist, resultado)
+                filhos.append(filho)
+        return filhos
+
+    def executar_geracao(self, pool=None):
+        num_filhos = self.parametros['novos_individuos_por_geracao']
+        self.avaliacoes += num_filhos
+        if pool is None and self.parametros.get('selecao', 'elitista') == 'elitista':
+            for _ in range(num_filhos):
+                pai1, pai2 = self.selecionar_pais()
+                self.substituir_pior_individuo(self.gerar_filho(pai1, pai2))
+        elif pool is None:
+            for pai1, pai2 in self.selecionar_pares(num_filhos):
+                self.substituir_pior_individuo(self.gerar_filho(pai1, pai2))
+        else:
+            for filho in self._gerar_filhos_paralelo(pool, num_filhos):
+                self.substituir_pior_individuo(filho)
 
-    def executar(self):
-        self.verificar_dados()
+        if self.parametros.get('busca_local') == 'elite':
+            # Melhora uma cópia do melhor indivíduo, que concorre como um filho
+            elite = self._melhor_individuo().copia()
+            self.avaliacoes += 1
+            if self.busca_local(elite):
+                self.substituir_pior_individuo(elite)
 
-        self.inicializar_populacao()
-        self.contador_sem_evolucao = 0
-        self.melhor_fitness_historico = []
+        self.atualizar_taxa_evolucao()
 
-        melhor_individuo = min(
-            self.populacao, key=lambda x: self.calcular_fitness(x)['fitness_total'])
-        melhor_fitness = self.calcular_fitness(
-            melhor_individuo)['fitness_total']
-        self.melhor_fitness_historico.append(melhor_fitness)
+    def substituir_pior_individuo(self, novo_individuo):
+        indice = self._indice_atualizado()
+        hash_novo = None
+        if indice.hashes is not None:
+            hash_novo = self.hash_individuo(novo_individuo)
+            if hash_novo in indice.hashes:
+                return False
+
+        fitness = float(self.calcular_fitness_lote([novo_individuo])['fitness_total'][0])
+        if len(self.populacao) < self.parametros['tamanho_populacao']:
+            self.populacao.append(novo_individuo)
+            indice.inserir(fitness, hash_novo)
+            return True
+
+        # Em empate com o pior, o novo indivíduo é o descartado
+        if fitness >= indice.fitness_pior():
+            return False
+        posicao = indice.pior()
+        hash_antigo = (self.hash_individuo(self.populacao[posicao])
+                       if indice.hashes is not None else None)
+        indice.substituir_pior(fitness, hash_novo, hash_antigo)
+        self.populacao[posicao] = novo_individuo
+        return True
+
+    def aplicar_alteracoes(self, alteracoes, tempo_reotimizacao=None):
+        # Aplica à instância já pré-processada uma lista de alterações
+        # (operacao, valor): ('adicionar_turma', turma), ('remover_turma', id),
+        # ('atualizar_turma', {'id': ..., campos}) e o mesmo para salas. Os
+        # índices são corrigidos no lugar (removidos compactados, novos e
+        # atualizados acrescentados ao fim), os genomas da população são
+        # remapeados pelos ids dos elementos, os genes afetados são realocados
+        # pelos critérios da mutação e o melhor indivíduo passa por uma busca
+        # local restrita a eles. Registros novos ou atualizados são validados
+        # antes de qualquer mudança; se algo falhar depois, a instância e a
+        # população são reconstruídas a partir dos registros anteriores
+        inicio = time.perf_counter()
+        validar = {'turma': validar_turma, 'sala': validar_sala}
+        registros = {'turma': {t['id']: t for t in self.turmas},
+                     'sala': {s['id']: s for s in self.salas}}
+        removidos = {'turma': set(), 'sala': set()}
+        novos = {'turma': {}, 'sala': {}}
+        for operacao, valor in alteracoes:
+            acao, _, entidade = operacao.partition('_')
+            if entidade not in registros or acao not in ('adicionar', 'remover', 'atualizar'):
+                raise ValueError(f"Operação desconhecida: {operacao}")
+            existentes = registros[entidade]
+            if acao != 'remover' and not isinstance(valor, dict):
+                raise ValueError(f"{operacao}: registro deve ser um objeto: {valor!r}")
+            id_registro = valor if acao == 'remover' else valor.get('id')
+            if acao == 'adicionar':
+                if id_registro in existentes:
+                    raise ValueError(f"ID de {entidade} duplicado: {id_registro}")
+                registro = valor
+            else:
+                if id_registro not in existentes:
+                    raise ValueError(f"ID de {entidade} inexistente: {id_registro}")
+                removidos[entidade].add(id_registro)
+                novos[entidade].pop(id_registro, None)
+                if acao == 'remover':
+                    del existentes[id_registro]
+                    continue
+                registro = dict(existentes[id_registro], **valor)
+            registro = validar[entidade](registro, f"{operacao} {id_registro}")
+            existentes[id_registro] = registro
+            novos[entidade][id_registro] = registro
+
+        turmas_anteriores, salas_anteriores = self.turmas, self.salas
+        self.turmas = [t for t in self.turmas if t['id'] not in removidos['turma']] + \
+            list(novos['turma'].values())
+        self.salas = [s for s in self.salas if s['id'] not in removidos['sala']] + \
+            list(novos['sala'].values())
+        try:
+            self.verificar_dados()
+        except ValueError:
+            self.turmas, self.salas = turmas_anteriores, salas_anteriores
+            raise
+
+        populacao = self.populacao
+        genomas = None
+        if populacao:
+            melhor = self._melhor_individuo()
+            posicao_melhor = next(i for i, ind in enumerate(populacao) if ind is melhor)
+            genomas = np.stack([ind.genoma for ind in populacao])
+        ids_genes = self.ids_turma
+        ids_salas = [s['id_elemento'] for s in self.elementos_sala_por_indice]
+
+        try:
+            if removidos['turma']:
+                self._remover_turmas(removidos['turma'])
+            if removidos['sala']:
+                self._remover_salas(removidos['sala'])
+            primeiro_gene_novo = self.num_genes
+            primeira_sala_nova = len(self.elementos_sala_por_indice)
+            elementos_turma, elementos_sala = self._criar_elementos(
+                novos['turma'].values(), novos['sala'].values())
+            self._indexar_elementos(novos['sala'].values(), elementos_turma, elementos_sala)
+            self._codificar_elementos(elementos_turma, elementos_sala)
+            # Estruturas montadas sob demanda a partir dos índices
+            self.plano_inicializacao = None
+            self.problemas_atribuicao = None
+            self.candidatos_busca_local = None
+            self.fitness_cache.limpar()
+            self.indice_populacao = None
+
+            resultado = {'genes_afetados': 0, 'movimentos': 0}
+            if not populacao:
+                resultado['tempo'] = time.perf_counter() - inicio
+                return None, resultado
+
+            # Genes e elementos de sala que continuam existindo (inclusive os
+            # recriados por uma atualização) mantêm a alocação
+            mapa_genes = np.array([self.indice_turma.get(i, -1) for i in ids_genes], dtype=np.intp)
+            mapa_salas = np.array([self.indice_sala.get(i, SEM_SALA) for i in ids_salas] + [SEM_SALA],
+                                  dtype=np.int32)
+            mantidos = mapa_genes >= 0
+            novos_genomas = np.full((len(populacao), self.num_genes), SEM_SALA, dtype=np.int32)
+            novos_genomas[:, mapa_genes[mantidos]] = mapa_salas[genomas[:, mantidos]]
+            alocados_antes = np.zeros(novos_genomas.shape, dtype=bool)
+            alocados_antes[:, mapa_genes[mantidos]] = genomas[:, mantidos] != SEM_SALA
+
+            # Turmas ou salas atualizadas podem ter mudado de tipo
+            recriados = np.arange(self.num_genes) >= primeiro_gene_novo
+            em_salas_novas = novos_genomas >= primeira_sala_nova
+            linhas, genes = np.nonzero((novos_genomas != SEM_SALA) & (recriados | em_salas_novas))
+            for linha, gene in zip(linhas.tolist(), genes.tolist()):
+                sala = self.elementos_sala_por_indice[novos_genomas[linha, gene]]
+                if sala['tipo'] != self.elemento_turma_por_id[self.ids_turma[gene]]['tipo']:
+                    novos_genomas[linha, gene] = SEM_SALA
+
+            afetados = np.flatnonzero(
+                recriados | em_salas_novas.any(axis=0) |
+                (alocados_antes & (novos_genomas == SEM_SALA)).any(axis=0)).tolist()
+            elementos_afetados = [self.elemento_turma_por_id[self.ids_turma[gene]]
+                                  for gene in afetados]
+            self.populacao = []
+            for genoma in novos_genomas:
+                individuo = Individuo(genoma)
+                for elemento in elementos_afetados:
+                    if genoma[elemento['indice']] == SEM_SALA:
+                        self._realocar_elemento(individuo, elemento)
+                self.populacao.append(individuo)
+
+            if tempo_reotimizacao is None:
+                tempo_reotimizacao = self.parametros.get('tempo_reotimizacao')
+            melhor = self.populacao[posicao_melhor]
+            resultado['genes_afetados'] = len(afetados)
+            resultado['movimentos'] = self.busca_local(
+                melhor, self.parametros.get('max_movimentos_reotimizacao', MOVIMENTOS_REOTIMIZACAO),
+                afetados, tempo_reotimizacao)
+            fitness = self.calcular_fitness_lote([melhor])
+            resultado.update({
+                'fitness_total': float(fitness['fitness_total'][0]),
+                'problemas_tamanho': int(fitness['problemas_tamanho'][0]),
+                'problemas_bloco': int(fitness['problemas_bloco'][0]),
+                'tempo': time.perf_counter() - inicio
+            })
+            return self.decodificar_individuo(melhor), resultado
+        except Exception:
+            self._restaurar_instancia(turmas_anteriores, salas_anteriores, genomas, ids_genes, ids_salas)
+            raise
+
+    def _restaurar_instancia(self, turmas, salas, genomas, ids_genes, ids_salas):
+        # Desfaz uma aplicação de alterações que falhou no meio: os índices
+        # são refeitos do zero a partir dos registros anteriores e os
+        # genomas, remapeados pelos ids dos elementos
+        self.turmas, self.salas = turmas, salas
+        self._construir_indices()
+        self.fitness_cache.limpar()
+        self.indice_populacao = None
+        if genomas is None:
+            return
+        mapa_genes = np.array([self.indice_turma[i] for i in ids_genes], dtype=np.intp)
+        mapa_salas = np.array([self.indice_sala[i] for i in ids_salas] + [SEM_SALA], dtype=np.int32)
+        restaurados = np.full((len(genomas), self.num_genes), SEM_SALA, dtype=np.int32)
+        restaurados[:, mapa_genes] = mapa_salas[genomas]
+        self.populacao = [Individuo(genoma) for genoma in restaurados]
+
+    def ativar_instrumentacao(self):
+        if self.instrumentacao is None:
+            self.instrumentacao = Instrumentacao()
+            self.instrumentacao.instalar(self)
+        return self.instrumentacao
+
+    def registrar_callback(self, evento, funcao):
+        # Eventos 'geracao' (fim de cada geração) e 'novo_melhor'; a função
+        # recebe o AG e o dicionário de métricas da geração
+        self.ativar_instrumentacao().registrar_callback(evento, funcao)
+
+    def dados_checkpoint(self, geracao):
+        # Tudo o que define a continuação da execução: genomas, ordem da
+        # população (fitness e sequência de inserção), quais indivíduos têm
+        # fitness incremental, as entradas de cache da população (o fitness
+        # incremental e o completo podem diferir no último bit), escalares da
+        # evolução e o estado do random
+        versao, estado_random, gauss = random.getstate()
+        em_cache = [self.fitness_cache.entradas.get(self.hash_individuo(ind))
+                    for ind in self.populacao]
+        dados = {
+            'versao': np.int64(VERSAO_CHECKPOINT),
+            'num_genes': np.int64(self.num_genes),
+            'num_salas': np.int64(len(self.elementos_sala_por_indice)),
+            'geracao': np.int64(geracao),
+            'genomas': np.stack([ind.genoma for ind in self.populacao]) if self.populacao
+            else np.empty((0, self.num_genes), dtype=np.int32),
+            'com_estado': np.array([ind.estado is not None for ind in self.populacao], dtype=bool),
+            'em_cache': np.array([r is not None for r in em_cache], dtype=bool),
+            'cache_fitness_total': np.array(
+                [r['fitness_total'] if r else 0.0 for r in em_cache], dtype=np.float64),
+            'cache_problemas_tamanho': np.array(
+                [r['problemas_tamanho'] if r else 0 for r in em_cache], dtype=np.int64),
+            'cache_problemas_bloco': np.array(
+                [r['problemas_bloco'] if r else 0 for r in em_cache], dtype=np.int64),
+            'taxa_evolucao': np.float64(self.taxa_evolucao),
+            'limite_insercao': np.int64(self.limite_insercao),
+            'contador_sem_evolucao': np.int64(self.contador_sem_evolucao),
+            'avaliacoes': np.int64(self.avaliacoes),
+            'melhor_fitness_historico': np.array(self.melhor_fitness_historico, dtype=np.float64),
+            'random_versao': np.int64(versao),
+            'random_estado': np.array(estado_random, dtype=np.uint64),
+            'random_gauss': np.array([] if gauss is None else [gauss], dtype=np.float64)
+        }
+        if self._indice_valido():
+            indice = self.indice_populacao
+            dados['fitness'] = np.array([f for f, _ in indice.chaves], dtype=np.float64)
+            dados['sequencias'] = np.array([s for _, s in indice.chaves], dtype=np.int64)
+            dados['sequencia'] = np.int64(indice.sequencia)
+        return dados
+
+    def salvar_checkpoint(self, caminho, geracao, gravador=None):
+        dados = self.dados_checkpoint(geracao)
+        if gravador is None:
+            gravador = GravadorCheckpoint()
+            gravador.gravar(caminho, dados)
+            gravador.aguardar()
+        else:
+            gravador.gravar(caminho, dados)
+
+    def carregar_checkpoint(self, caminho):
+        with np.load(caminho) as dados:
+            if int(dados['versao']) != VERSAO_CHECKPOINT:
+                raise ValueError(f"Versão de checkpoint não suportada: {int(dados['versao'])}")
+            if (int(dados['num_genes']) != self.num_genes or
+                    int(dados['num_salas']) != len(self.elementos_sala_por_indice)):
+                raise ValueError("Checkpoint gerado para outra instância de turmas e salas")
+
+            self.populacao = []
+            for genoma, com_estado in zip(dados['genomas'], dados['com_estado']):
+                individuo = Individuo(genoma.copy())
+                if com_estado:
+                    # O estado incremental é função só do genoma
+                    self.avaliar_incremental(individuo)
+                self.populacao.append(individuo)
+
+            for individuo, em_cache, total, tamanho, bloco in zip(
+                    self.populacao, dados['em_cache'], dados['cache_fitness_total'].tolist(),
+                    dados['cache_problemas_tamanho'].tolist(), dados['cache_problemas_bloco'].tolist()):
+                if em_cache:
+                    self.fitness_cache.guardar(self.hash_individuo(individuo), {
+                        'fitness_total': total,
+                        'problemas_tamanho': tamanho,
+                        'problemas_bloco': bloco
+                    })
+
+            self.indice_populacao = None
+            if 'fitness' in dados:
+                hashes = ([self.hash_individuo(ind) for ind in self.populacao]
+                          if self.parametros.get('rejeitar_duplicados', False) else None)
+                self.indice_populacao = IndicePopulacao(
+                    self.populacao, dados['fitness'].tolist(), hashes,
+                    dados['sequencias'].tolist(), int(dados['sequencia']))
+
+            self.taxa_evolucao = float(dados['taxa_evolucao'])
+            self.limite_insercao = int(dados['limite_insercao'])
+            self.contador_sem_evolucao = int(dados['contador_sem_evolucao'])
+            self.avaliacoes = int(dados['avaliacoes']) if 'avaliacoes' in dados else 0
+            self.melhor_fitness_historico = dados['melhor_fitness_historico'].tolist()
+            gauss = dados['random_gauss'].tolist()
+            random.setstate((int(dados['random_versao']),
+                             tuple(dados['random_estado'].tolist()),
+                             gauss[0] if gauss else None))
+            return int(dados['geracao'])
+
+    def _geracoes_sem_melhora(self):
+        historico = self.melhor_fitness_historico
+        return len(historico) - 1 - historico.index(min(historico)) if historico else 0
+
+    def _criterio_parada(self, inicio, duracao_geracao):
+        # Verificado antes de cada geração. Tempo e avaliações são checados de
+        # forma preventiva: não se inicia uma geração que, pela duração da
+        # anterior, terminaria depois do tempo limite, nem uma que passaria
+        # do máximo de avaliações
+        tempo_limite = self.parametros.get('tempo_limite')
+        if tempo_limite is not None and time.time() - inicio + duracao_geracao > tempo_limite:
+            return 'tempo_limite'
+
+        max_avaliacoes = self.parametros.get('max_avaliacoes')
+        if max_avaliacoes is not None:
+            # A busca local no elite conta como mais uma avaliação por geração
+            avaliacoes_geracao = (self.parametros['novos_individuos_por_geracao'] +
+                                  (self.parametros.get('busca_local') == 'elite'))
+            if self.avaliacoes + avaliacoes_geracao > max_avaliacoes:
+                return 'max_avaliacoes'
+
+        fitness_alvo = self.parametros.get('fitness_alvo')
+        if fitness_alvo is not None and min(self.melhor_fitness_historico) <= fitness_alvo:
+            return 'fitness_alvo'
+
+        geracoes_sem_melhora = self.parametros.get('geracoes_sem_melhora')
+        if geracoes_sem_melhora is not None and self._geracoes_sem_melhora() >= geracoes_sem_melhora:
+            return 'geracoes_sem_melhora'
 
-        print("\nIniciando algoritmo genético com as seguintes configurações:")
-        print(
-            f"- População: {self.parametros['tamanho_populacao']} indivíduos")
-        print(f"- Gerações: {self.parametros['num_geracoes']}")
-        print(f"- Fitness inicial: {melhor_fitness:.2f}")
+        return None
 
-        inicio = time.time()
-        for geracao in range(self.parametros['num_geracoes']):
-            try:
-                for _ in range(self.parametros['novos_individuos_por_geracao']):
-                    pai1, pai2 = self.selecionar_pais()
-                    filho = self.crossover(pai1, pai2)
-                    filho = self.mutacao(filho)
-                    self.substituir_pior_individuo(filho)
+    def executar(self, retomar_de=None):
+        inicio_execucao = time.time()
+        self.verificar_dados()
 
-                self.atualizar_taxa_evolucao()
+        pool = self.criar_pool()
+        caminho_checkpoint = self.parametros.get('checkpoint')
+        intervalo_checkpoint = self.parametros.get('intervalo_checkpoint', 10)
+        gravador = GravadorCheckpoint() if caminho_checkpoint else None
+        historico_arquivo = None
+        try:
+            if retomar_de is not None:
+                geracao_inicial = self.carregar_checkpoint(retomar_de)
+                melhor_fitness = self.melhor_fitness_historico[-1]
+                print(f"\nRetomando do checkpoint {retomar_de} na geração {geracao_inicial}")
+            else:
+                geracao_inicial = 0
+                self.inicializar_populacao(pool)
+                self.avaliacoes = len(self.populacao)
+                self.contador_sem_evolucao = 0
+                self.melhor_fitness_historico = []
 
-                melhor_individuo = min(
-                    self.populacao, key=lambda x: self.calcular_fitness(x)['fitness_total'])
+                melhor_individuo = self._melhor_individuo()
                 melhor_fitness = self.calcular_fitness(
                     melhor_individuo)['fitness_total']
                 self.melhor_fitness_historico.append(melhor_fitness)
 
-                if geracao % 10 == 0 or geracao == self.parametros['num_geracoes']:
-                    print(f"\nGeração {geracao}:")
-                    print(f"- Melhor fitness: {melhor_fitness:.2f}")
-                    print(f"- Taxa de evolução: {self.taxa_evolucao:.2f}%")
-                    print(f"- Limite de inserção: {self.limite_insercao}")
-
-                    fit = self.calcular_fitness(melhor_individuo)
-                    print(f"- Turmas não alocadas: {fit['problemas_tamanho']}")
-                    print(f"- Problemas de bloco: {fit['problemas_bloco']}")
+            print("\nIniciando algoritmo genético com as seguintes configurações:")
+            print(
+                f"- População: {self.parametros['tamanho_populacao']} indivíduos")
+            print(f"- Gerações: {self.parametros['num_geracoes']}")
+            print(f"- Fitness inicial: {melhor_fitness:.2f}")
+
+            inicio = time.time()
+            if self.parametros.get('arquivo_historico'):
+                # Ao retomar, o arquivo é reescrito com o histórico restaurado
+                historico_arquivo = HistoricoArquivo(self.parametros['arquivo_historico'])
+                for indice, valor in enumerate(self.melhor_fitness_historico):
+                    historico_arquivo.registrar(indice, valor, 0.0)
+            if self.instrumentacao is not None:
+                self.instrumentacao.iniciar(self)
+            self.criterio_parada = 'num_geracoes'
+            duracao_geracao = 0.0
+            for geracao in range(geracao_inicial, self.parametros['num_geracoes']):
+                criterio = self._criterio_parada(inicio_execucao, duracao_geracao)
+                if criterio is not None:
+                    self.criterio_parada = criterio
+                    break
 
-            except Exception as e:
-                print(f"\nErro na geração {geracao}: {str(e)}")
-                break
+                inicio_geracao = time.time()
+                try:
+                    self.executar_geracao(pool)
+
+                    melhor_individuo = self._melhor_individuo()
+                    melhor_fitness = self.calcular_fitness(
+                        melhor_individuo)['fitness_total']
+                    self.melhor_fitness_historico.append(melhor_fitness)
+                    if historico_arquivo is not None:
+                        historico_arquivo.registrar(
+                            geracao + 1, melhor_fitness, time.time() - inicio)
+                    if self.instrumentacao is not None:
+                        self.instrumentacao.fim_geracao(
+                            self, geracao, melhor_individuo, melhor_fitness)
+
+                    if gravador is not None and (geracao + 1) % intervalo_checkpoint == 0:
+                        self.salvar_checkpoint(caminho_checkpoint, geracao + 1, gravador)
+
+                    if geracao % 10 == 0 or geracao == self.parametros['num_geracoes']:
+                        print(f"\nGeração {geracao}:")
+                        print(f"- Melhor fitness: {melhor_fitness:.2f}")
+                        print(f"- Taxa de evolução: {self.taxa_evolucao:.2f}%")
+                        print(f"- Limite de inserção: {self.limite_insercao}")
+
+                        fit = self.calcular_fitness(melhor_individuo)
+                        print(f"- Turmas não alocadas: {fit['problemas_tamanho']}")
+                        print(f"- Problemas de bloco: {fit['problemas_bloco']}")
+
+                except Exception as e:
+                    print(f"\nErro na geração {geracao}: {str(e)}")
+                    self.criterio_parada = 'erro'
+                    break
+                duracao_geracao = time.time() - inicio_geracao
+        except BaseException:
+            # Interrompida fora do laço de gerações (inicialização, retomada,
+            # KeyboardInterrupt): não espera os filhos pendentes do pool
+            if pool is not None:
+                pool.terminate()
+            raise
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if historico_arquivo is not None:
+                historico_arquivo.fechar()
+            if gravador is not None:
+                gravador.aguardar()
 
         tempo_total = (time.time() - inicio) / 60
-        melhor_individuo = min(
-            self.populacao, key=lambda x: self.calcular_fitness(x)['fitness_total'])
-        resultado = self.calcular_fitness(melhor_individuo)
+        melhor_individuo = self._melhor_individuo()
+        # Cópia: o dicionário de calcular_fitness é o mesmo guardado no cache
+        resultado = dict(self.calcular_fitness(melhor_individuo),
+                         criterio_parada=self.criterio_parada)
 
         print("\n=== RESULTADOS FINAIS ===")
         print(f"Melhor fitness: {resultado['fitness_total']:.2f}")
@@ -488,50 +2128,67 @@ class AlocacaoTurmasAG:
             f"Problemas de bloco preferencial: {resultado['problemas_bloco']}")
         print(f"Taxa de evolução final: {self.taxa_evolucao:.2f}%")
         print(f"Tempo de execução: {tempo_total:.2f} minutos")
+        print(f"Critério de parada: {self.criterio_parada} "
+              f"({len(self.melhor_fitness_historico) - 1} gerações, {self.avaliacoes} avaliações)")
+        cache = self.fitness_cache.estatisticas()
+        print(f"Cache de fitness: {cache['acertos']} acertos, {cache['falhas']} falhas, "
+              f"{cache['remocoes']} remoções ({cache['taxa_acerto']:.1%})")
+        busca = self.estatisticas_busca_local
+        if busca['execucoes']:
+            print(f"Busca local: {busca['aceitos']} movimentos aceitos de {busca['avaliados']} "
+                  f"avaliados em {busca['execucoes']} execuções "
+                  f"({busca['avaliados'] / max(busca['tempo'], 1e-9):.0f} movimentos/s)")
+        if self.instrumentacao is not None:
+            print("Tempo por fase (inclusivo):")
+            if self.parametros.get('workers', 1) > 1:
+                print("(fases dos filhos somadas entre os workers; podem passar do tempo total)")
+            for nome, valores in self.instrumentacao.resumo().items():
+                if valores['chamadas']:
+                    print(f"- {nome}: {valores['tempo']:.3f} s em {valores['chamadas']} chamadas")
 
         nao_alocadas = [e['id_elemento'] for e in self.elementos_turma
-                        if e['id_elemento'] not in melhor_individuo or melhor_individuo[e['id_elemento']] is None]
+                        if melhor_individuo.genoma[e['indice']] == SEM_SALA]
 
         print(
             f"\nHorários não alocados: {len(nao_alocadas)}/{len(self.elementos_turma)}")
 
-        self.plotar_evolucao()
+        if self.parametros.get('grafico') or self.parametros.get('mostrar_grafico', False):
+            self.plotar_evolucao(self.parametros.get('grafico'),
+                                 self.parametros.get('mostrar_grafico', False))
 
-        return melhor_individuo, resultado
+        return self.decodificar_individuo(melhor_individuo), resultado
 
-    def plotar_evolucao(self):
-        plt.figure(figsize=(12, 6))
+    def plotar_evolucao(self, caminho=None, mostrar=True):
+        plotar_evolucao(self.melhor_fitness_historico, caminho, mostrar)
 
-        plt.subplot(1, 2, 1)
-        plt.plot(self.melhor_fitness_historico)
-        plt.title("Evolução do Melhor Fitness")
-        plt.xlabel("Geração")
-        plt.ylabel("Fitness")
-        plt.grid(True)
 
-        plt.tight_layout()
-        plt.show()
+DIAS_SEMANA = ['seg', 'ter', 'qua', 'qui', 'sex', 'sab']
+PERIODOS_DIA = ['7:30', '9:30', '11:30', '13:30', '15:30', '17:30', '19:30', '21:30', '23:30']
 
 
-if __name__ == "__main__":
-    random.seed(27)
+def gerar_instancia_sintetica(num_salas=58, num_turmas=1348, num_blocos=11,
+                              proporcao_salas_especiais=0.1, proporcao_turmas_especiais=0.05,
+                              dias=DIAS_SEMANA, periodos=PERIODOS_DIA, semente=27, gerador=None):
+    # Campus sintético; com os valores padrão e semente 27 reproduz a
+    # instância de exemplo (58 salas, 1348 turmas, 11 blocos). gerador pode
+    # ser o próprio módulo random, para continuar a sequência global
+    if gerador is None:
+        gerador = random.Random(semente)
 
-    blocos = {
-        'PA': {'posicao': 1}, 'PB': {'posicao': 2}, 'PC': {'posicao': 3},
-        'PD': {'posicao': 4}, 'PE': {'posicao': 5}, 'PF': {'posicao': 6},
-        'PG': {'posicao': 7}, 'PH': {'posicao': 8}, 'PI': {'posicao': 9},
-        'PJ': {'posicao': 10}, 'PK': {'posicao': 11}
-    }
+    blocos = {}
+    for i in range(num_blocos):
+        nome = f"P{chr(ord('A') + i)}" if num_blocos <= 26 else f"P{i + 1}"
+        blocos[nome] = {'posicao': i + 1}
 
     salas = []
-    for i in range(1, 59):
-        bloco = random.choice(list(blocos.keys()))
-        capacidade = random.choice(range(60, 110))
-        tipo = 'regular' if random.random() > 0.1 else 'especial'
+    for i in range(1, num_salas + 1):
+        bloco = gerador.choice(list(blocos.keys()))
+        capacidade = gerador.choice(range(60, 110))
+        tipo = 'regular' if gerador.random() > proporcao_salas_especiais else 'especial'
 
         horarios = []
-        for dia in ['seg', 'ter', 'qua', 'qui', 'sex', 'sab']:
-            for periodo in ['7:30', '9:30', '11:30', '13:30', '15:30', '17:30', '19:30', '21:30', '23:30']:
+        for dia in dias:
+            for periodo in periodos:
                 horarios.append(f"{dia}_{periodo}")
 
         salas.append({
@@ -543,17 +2200,16 @@ if __name__ == "__main__":
         })
 
     turmas = []
-    for i in range(1, 1349):
-        num_alunos = random.choice(range(10, 110))
-        bloco_pref = random.choice(list(blocos.keys()) + [None])
-        tipo = 'regular' if random.random() > 0.05 else 'especial'
+    for i in range(1, num_turmas + 1):
+        num_alunos = gerador.choice(range(10, 110))
+        bloco_pref = gerador.choice(list(blocos.keys()) + [None])
+        tipo = 'regular' if gerador.random() > proporcao_turmas_especiais else 'especial'
 
-        num_horarios = random.randint(1, 3)
+        num_horarios = gerador.randint(1, 3)
         horarios = []
         for _ in range(num_horarios):
-            dia = random.choice(['seg', 'ter', 'qua', 'qui', 'sex', 'sab'])
-            periodo = random.choice(
-                ['7:30', '9:30', '11:30', '13:30', '15:30', '17:30', '19:30', '21:30', '23:30'])
+            dia = gerador.choice(dias)
+            periodo = gerador.choice(periodos)
             horarios.append(f"{dia}_{periodo}")
 
         turmas.append({
@@ -564,12 +2220,20 @@ if __name__ == "__main__":
             'horarios': horarios
         })
 
+    return turmas, salas, blocos
+
+
+if __name__ == "__main__":
+    random.seed(27)
+    turmas, salas, blocos = gerar_instancia_sintetica(gerador=random)
+
     parametros_otimizados = {
         'tamanho_populacao': 100,
         'num_geracoes': 200,
         'novos_individuos_por_geracao': 3,
         'taxa_crossover': 150,
-        'periodos_sem_evolucao': 9
+        'periodos_sem_evolucao': 9,
+        'mostrar_grafico': True
     }
 
     ag = AlocacaoTurmasAG(turmas, salas, blocos, parametros_otimizados)
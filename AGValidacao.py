@@ -0,0 +1,76 @@
+# Validação dos registros de turmas, salas e blocos, usada pelos leitores de
+# AGDados e pelas alterações de AlocacaoTurmasAG.aplicar_alteracoes
+
+
+# Separador de horários nas colunas de lista dos arquivos CSV
+SEPARADOR_HORARIOS = ';'
+
+
+def _inteiro(valor, campo, origem):
+    try:
+        inteiro = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{origem}: campo '{campo}' deve ser inteiro: {valor!r}") from None
+    if inteiro <= 0:
+        raise ValueError(f"{origem}: campo '{campo}' deve ser positivo: {inteiro}")
+    return inteiro
+
+
+def _lista(valor, campo, origem):
+    if isinstance(valor, str):
+        valor = [h.strip() for h in valor.split(SEPARADOR_HORARIOS) if h.strip()]
+    if not isinstance(valor, list) or not valor:
+        raise ValueError(f"{origem}: campo '{campo}' deve ser uma lista não vazia")
+    return valor
+
+
+def _obrigatorio(registro, campo, origem):
+    valor = registro.get(campo)
+    if valor is None or valor == '':
+        raise ValueError(f"{origem}: campo obrigatório ausente: '{campo}'")
+    return valor
+
+
+def _tipo(registro, origem):
+    tipo = registro.get('tipo') or 'regular'
+    if tipo not in ('regular', 'especial'):
+        raise ValueError(f"{origem}: tipo desconhecido: {tipo!r}")
+    return tipo
+
+
+def _registro(registro, origem):
+    if not isinstance(registro, dict):
+        raise ValueError(f"{origem}: registro deve ser um objeto: {registro!r}")
+    return registro
+
+
+def validar_turma(registro, origem):
+    # Devolve a turma com os campos normalizados; o id é mantido como veio
+    registro = _registro(registro, origem)
+    return {
+        'id': _obrigatorio(registro, 'id', origem),
+        'num_alunos': _inteiro(_obrigatorio(registro, 'num_alunos', origem), 'num_alunos', origem),
+        'bloco_preferencial': registro.get('bloco_preferencial') or None,
+        'tipo': _tipo(registro, origem),
+        'horarios': _lista(_obrigatorio(registro, 'horarios', origem), 'horarios', origem)
+    }
+
+
+def validar_sala(registro, origem):
+    registro = _registro(registro, origem)
+    return {
+        'id': _obrigatorio(registro, 'id', origem),
+        'bloco': _obrigatorio(registro, 'bloco', origem),
+        'capacidade': _inteiro(_obrigatorio(registro, 'capacidade', origem), 'capacidade', origem),
+        'tipo': _tipo(registro, origem),
+        'horarios_disponiveis': _lista(
+            _obrigatorio(registro, 'horarios_disponiveis', origem), 'horarios_disponiveis', origem)
+    }
+
+
+def validar_bloco(registro, origem):
+    registro = _registro(registro, origem)
+    return {
+        'id': _obrigatorio(registro, 'id', origem),
+        'posicao': _inteiro(_obrigatorio(registro, 'posicao', origem), 'posicao', origem)
+    }
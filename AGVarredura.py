@@ -0,0 +1,323 @@
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from AGBenchmark import PARAMETROS_BASE, PRESETS
+from AGDados import carregar_instancia
+from AGTurmas import AlocacaoTurmasAG, gerar_instancia_sintetica, validar_parametros
+
+
+# Definidos pela própria varredura, ou que gravariam arquivos a cada execução
+PARAMETROS_FIXOS = ('num_geracoes', 'workers', 'checkpoint', 'arquivo_historico', 'grafico',
+                    'mostrar_grafico')
+
+
+# Instância estática de cada processo da varredura, recebida uma única vez
+# no inicializador do pool
+_ag_varredura = None
+
+
+def _iniciar_trabalhador_varredura(ag):
+    global _ag_varredura
+    _ag_varredura = ag
+
+
+def _executar_configuracao(tarefa):
+    # Roda (ou continua, a partir do checkpoint em memória da rodada
+    # anterior) uma configuração com uma semente até 'geracoes'. Como a
+    # retomada de checkpoint é exata, a curva é a mesma de uma execução
+    # contínua da configuração
+    parametros, semente, geracoes, checkpoint, guardar = tarefa
+    ag = _ag_varredura._copia_estatica(dict(parametros, num_geracoes=geracoes, workers=1))
+    inicio = time.perf_counter()
+    with open(os.devnull, 'w') as descarte, contextlib.redirect_stdout(descarte):
+        if checkpoint is None:
+            random.seed(semente)
+            ag.executar()
+        else:
+            ag.executar(retomar_de=io.BytesIO(checkpoint))
+    tempo = time.perf_counter() - inicio
+
+    resultado = {
+        'historico': ag.melhor_fitness_historico,
+        'avaliacoes': ag.avaliacoes,
+        'tempo': tempo,
+        'criterio_parada': ag.criterio_parada,
+        'checkpoint': None
+    }
+    if guardar:
+        buffer = io.BytesIO()
+        np.savez(buffer, **ag.dados_checkpoint(len(ag.melhor_fitness_historico) - 1))
+        resultado['checkpoint'] = buffer.getvalue()
+    return resultado
+
+
+def _sortear_valor(gerador, nome, espaco):
+    if isinstance(espaco, list):
+        return gerador.choice(espaco)
+    if not isinstance(espaco, dict) or 'min' not in espaco or 'max' not in espaco:
+        raise ValueError(f"Espaço de '{nome}' deve ser uma lista de valores ou {{'min', 'max'}}")
+    minimo, maximo = espaco['min'], espaco['max']
+    if espaco.get('log', False):
+        valor = math.exp(gerador.uniform(math.log(minimo), math.log(maximo)))
+    else:
+        valor = gerador.uniform(minimo, maximo)
+    if espaco.get('inteiro', isinstance(minimo, int) and isinstance(maximo, int)):
+        return int(round(valor))
+    return valor
+
+
+def gerar_configuracoes(espaco, amostras=None, semente=0):
+    # Sem amostras, o produto cartesiano das listas de valores (grade); com
+    # amostras, sorteio aleatório, aceitando também faixas
+    # {'min', 'max', 'log', 'inteiro'}
+    nomes = list(espaco)
+    for nome in nomes:
+        if nome in PARAMETROS_FIXOS:
+            raise ValueError(f"Parâmetro definido pela varredura: {nome}")
+    if amostras is None:
+        for nome in nomes:
+            if not isinstance(espaco[nome], list) or not espaco[nome]:
+                raise ValueError(f"Busca em grade aceita apenas listas de valores: '{nome}'")
+        return [dict(zip(nomes, valores))
+                for valores in itertools.product(*(espaco[nome] for nome in nomes))]
+
+    gerador = random.Random(semente)
+    configuracoes, vistas = [], set()
+    for _ in range(amostras * 10):
+        if len(configuracoes) == amostras:
+            break
+        configuracao = {nome: _sortear_valor(gerador, nome, espaco[nome]) for nome in nomes}
+        assinatura = json.dumps(configuracao, sort_keys=True)
+        if assinatura not in vistas:
+            vistas.add(assinatura)
+            configuracoes.append(configuracao)
+    return configuracoes
+
+
+def rodadas_poda(geracoes, geracoes_iniciais, eta):
+    # Orçamento de gerações de cada rodada: geracoes_iniciais * eta^k até
+    # chegar a geracoes
+    rodadas = []
+    orcamento = geracoes_iniciais
+    while orcamento < geracoes:
+        rodadas.append(orcamento)
+        orcamento *= eta
+    return rodadas + [geracoes]
+
+
+def _valor_em(historico, geracao):
+    # Execuções paradas antes por outro critério valem pelo último valor
+    return historico[min(geracao, len(historico) - 1)]
+
+
+def varredura(ag, espaco, sementes=(27,), amostras=None, geracoes=200, geracoes_iniciais=None,
+              eta=3, workers=1, parametros_base=None, semente_busca=0):
+    # Successive halving: todas as configurações rodam com todas as sementes
+    # até o orçamento da primeira rodada; só a melhor fração 1/eta (pelo
+    # melhor fitness médio entre as sementes) continua para a rodada
+    # seguinte, retomando do ponto em que parou
+    if eta < 2:
+        raise ValueError(f"eta deve ser pelo menos 2: {eta}")
+    if geracoes_iniciais is None:
+        geracoes_iniciais = max(1, geracoes // eta ** 2)
+    configuracoes = gerar_configuracoes(espaco, amostras, semente_busca)
+    rodadas = rodadas_poda(geracoes, geracoes_iniciais, eta)
+    base = dict(PARAMETROS_BASE, tamanho_populacao=100)
+    base.update(parametros_base or {})
+
+    execucoes = [{
+        'configuracao': configuracao,
+        'parametros': dict(base, **configuracao),
+        'sementes': {semente: {'historico': [], 'avaliacoes': 0, 'tempo': 0.0,
+                               'criterio_parada': None, 'checkpoint': None}
+                     for semente in sementes},
+        'geracoes': 0,
+        'podada_em': None
+    } for configuracao in configuracoes]
+    # As cópias de cada tarefa não passam pelo construtor: um valor inválido
+    # no espaço de busca falha aqui, antes de qualquer execução
+    for execucao in execucoes:
+        try:
+            validar_parametros(execucao['parametros'])
+        except ValueError as e:
+            raise ValueError(f"Configuração {json.dumps(execucao['configuracao'], ensure_ascii=False)}: "
+                             f"{e}") from None
+
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, initializer=_iniciar_trabalhador_varredura,
+                                    initargs=(ag._copia_estatica(),))
+    else:
+        _iniciar_trabalhador_varredura(ag._copia_estatica())
+    inicio = time.perf_counter()
+    try:
+        ativas = list(execucoes)
+        for numero, orcamento in enumerate(rodadas):
+            ultima = numero == len(rodadas) - 1
+            tarefas = [(execucao['parametros'], semente, orcamento, estado['checkpoint'], not ultima)
+                       for execucao in ativas for semente, estado in execucao['sementes'].items()]
+            resultados = (pool.map(_executar_configuracao, tarefas, chunksize=1) if pool is not None
+                          else list(map(_executar_configuracao, tarefas)))
+
+            resultados = iter(resultados)
+            for execucao in ativas:
+                execucao['geracoes'] = orcamento
+                for estado in execucao['sementes'].values():
+                    resultado = next(resultados)
+                    estado['tempo'] += resultado['tempo']
+                    estado.update(historico=resultado['historico'], avaliacoes=resultado['avaliacoes'],
+                                  criterio_parada=resultado['criterio_parada'],
+                                  checkpoint=resultado['checkpoint'])
+                execucao['fitness'] = statistics.fmean(
+                    _valor_em(estado['historico'], orcamento) for estado in execucao['sementes'].values())
+
+            ativas.sort(key=lambda e: e['fitness'])
+            print(f"Rodada {numero + 1}/{len(rodadas)}: {len(ativas)} configurações x "
+                  f"{len(sementes)} sementes até a geração {orcamento}, melhor fitness médio "
+                  f"{ativas[0]['fitness']:.2f} ({time.perf_counter() - inicio:.1f} s)")
+            if not ultima:
+                mantidas = max(1, math.ceil(len(ativas) / eta))
+                for execucao in ativas[mantidas:]:
+                    execucao['podada_em'] = orcamento
+                    for estado in execucao['sementes'].values():
+                        estado['checkpoint'] = None
+                ativas = ativas[:mantidas]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    tabela = [_linha_tabela(execucao) for execucao in execucoes]
+    # Primeiro as que chegaram mais longe, depois pelo fitness médio
+    tabela.sort(key=lambda linha: (-linha['geracoes'], linha['fitness_medio']))
+    for posicao, linha in enumerate(tabela, 1):
+        linha['posicao'] = posicao
+
+    geracoes_executadas = sum(e['geracoes'] for e in execucoes) * len(sementes)
+    return {
+        'espaco': espaco,
+        'sementes': list(sementes),
+        'rodadas': rodadas,
+        'eta': eta,
+        'parametros_base': base,
+        'tempo_total': time.perf_counter() - inicio,
+        'geracoes_executadas': geracoes_executadas,
+        'geracoes_sem_poda': len(execucoes) * len(sementes) * geracoes,
+        'tabela': tabela
+    }
+
+
+def _linha_tabela(execucao):
+    estados = list(execucao['sementes'].values())
+    finais = [_valor_em(estado['historico'], execucao['geracoes']) for estado in estados]
+    return {
+        'configuracao': execucao['configuracao'],
+        'geracoes': execucao['geracoes'],
+        'podada_em': execucao['podada_em'],
+        'fitness_medio': statistics.fmean(finais),
+        'fitness_desvio': statistics.pstdev(finais),
+        'fitness_melhor': min(finais),
+        'tempo_medio': statistics.fmean(estado['tempo'] for estado in estados),
+        'avaliacoes_medias': statistics.fmean(estado['avaliacoes'] for estado in estados),
+        'criterios_parada': sorted({estado['criterio_parada'] for estado in estados})
+    }
+
+
+def imprimir_tabela(varredura_resultado):
+    print(f"\n{'#':>3} {'gerações':>8} {'fitness médio':>15} {'desvio':>10} {'tempo (s)':>9} "
+          f"{'avaliações':>10}  configuração")
+    for linha in varredura_resultado['tabela']:
+        print(f"{linha['posicao']:>3} {linha['geracoes']:>8} {linha['fitness_medio']:>15.2f} "
+              f"{linha['fitness_desvio']:>10.2f} {linha['tempo_medio']:>9.2f} "
+              f"{linha['avaliacoes_medias']:>10.0f}  "
+              f"{json.dumps(linha['configuracao'], ensure_ascii=False)}")
+    print(f"\n{varredura_resultado['geracoes_executadas']} gerações executadas "
+          f"(sem poda: {varredura_resultado['geracoes_sem_poda']}) em "
+          f"{varredura_resultado['tempo_total']:.1f} s")
+
+
+def _gravar(varredura_resultado, caminho):
+    if os.path.splitext(caminho)[1].lower() == '.csv':
+        nomes = list(varredura_resultado['espaco'])
+        campos = ['posicao'] + nomes + ['geracoes', 'podada_em', 'fitness_medio', 'fitness_desvio',
+                                        'fitness_melhor', 'tempo_medio', 'avaliacoes_medias']
+        with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=campos, extrasaction='ignore')
+            escritor.writeheader()
+            for linha in varredura_resultado['tabela']:
+                escritor.writerow(dict(linha, **linha['configuracao']))
+    else:
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(varredura_resultado, arquivo, ensure_ascii=False, indent=2)
+
+
+def _ler_espaco(texto):
+    # JSON direto na linha de comando ou caminho de um arquivo JSON
+    if os.path.exists(texto):
+        with open(texto, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Espaço de busca inválido: {e}") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros do AG de alocação de turmas")
+    parser.add_argument('--espaco', required=True,
+                        help="JSON (ou arquivo .json) com os valores de cada parâmetro, "
+                             "como {\"tamanho_populacao\": [50, 100, 200]}")
+    parser.add_argument('--amostras', type=int,
+                        help="busca aleatória com este número de configurações (padrão: grade)")
+    parser.add_argument('--sementes', type=int, nargs='+', default=[27])
+    parser.add_argument('--geracoes', type=int, default=200)
+    parser.add_argument('--geracoes-iniciais', type=int,
+                        help="orçamento da primeira rodada (padrão: geracoes / eta²)")
+    parser.add_argument('--eta', type=int, default=3, help="fração 1/eta mantida a cada rodada")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--preset', default='medio', choices=list(PRESETS),
+                        help="instância sintética (sem --turmas/--salas/--blocos)")
+    parser.add_argument('--semente-instancia', type=int, default=27)
+    parser.add_argument('--turmas', help="arquivo de turmas (.jsonl ou .csv)")
+    parser.add_argument('--salas', help="arquivo de salas (.jsonl ou .csv)")
+    parser.add_argument('--blocos', help="arquivo de blocos (.jsonl ou .csv)")
+    parser.add_argument('--semente-busca', type=int, default=0)
+    parser.add_argument('--saida', help="grava a tabela (.csv) ou o resultado completo (.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        espaco = _ler_espaco(args.espaco)
+        if args.turmas or args.salas or args.blocos:
+            ag = carregar_instancia(args.turmas, args.salas, args.blocos, {})
+        else:
+            turmas, salas, blocos = gerar_instancia_sintetica(
+                semente=args.semente_instancia, **PRESETS[args.preset]['instancia'])
+            ag = AlocacaoTurmasAG(turmas, salas, blocos, {})
+        resultado = varredura(ag, espaco, args.sementes, args.amostras, args.geracoes,
+                              args.geracoes_iniciais, args.eta, args.workers,
+                              semente_busca=args.semente_busca)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    imprimir_tabela(resultado)
+    if args.saida:
+        _gravar(resultado, args.saida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import random
+
+from AGTurmas import AlocacaoTurmasAG, gerar_instancia_sintetica
+
+
+PARAMETROS = {
+    'tamanho_populacao': 10,
+    'num_geracoes': 5,
+    'novos_individuos_por_geracao': 3,
+    'taxa_crossover': 150,
+    'periodos_sem_evolucao': 9,
+    'busca_local': 'elite',
+    'selecao': 'torneio',
+    'rejeitar_duplicados': True
+}
+
+
+def _historico(turmas, salas, blocos):
+    random.seed(1)
+    ag = AlocacaoTurmasAG(turmas, salas, blocos, PARAMETROS)
+    ag.executar()
+    return ag.melhor_fitness_historico
+
+
+def test_busca_local_reprodutivel_pela_semente():
+    turmas, salas, blocos = gerar_instancia_sintetica(semente=27)
+    assert _historico(turmas, salas, blocos) == _historico(turmas, salas, blocos)
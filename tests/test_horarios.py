@@ -0,0 +1,32 @@
+import random
+
+from AGHorarios import SolverPorHorario
+from AGTurmas import SEM_SALA, gerar_instancia_sintetica
+
+
+PARAMETROS = {
+    'tamanho_populacao': 10,
+    'num_geracoes': 5,
+    'novos_individuos_por_geracao': 3,
+    'taxa_crossover': 150,
+    'periodos_sem_evolucao': 9
+}
+
+
+def test_coordenacao_respeita_tipo_e_horario():
+    random.seed(1)
+    # Poucas salas: sobram elementos sem sala para a coordenação realocar
+    turmas, salas, blocos = gerar_instancia_sintetica(num_salas=15, num_turmas=300,
+                                                      proporcao_turmas_especiais=0.3, semente=3)
+    solver = SolverPorHorario(turmas, salas, blocos, PARAMETROS)
+    individuo = solver.resolver_horarios()
+    assert solver.coordenar(individuo) > 0
+
+    ag = solver.ag
+    for elemento in ag.elementos_turma:
+        indice_sala = int(individuo.genoma[elemento['indice']])
+        if indice_sala == SEM_SALA:
+            continue
+        sala = ag.elementos_sala_por_indice[indice_sala]
+        assert sala['tipo'] == elemento['tipo'], elemento['id_elemento']
+        assert sala['horario'] == elemento['horario'], elemento['id_elemento']
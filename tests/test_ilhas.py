@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+import AGIlhas
+from AGIlhas import ModeloIlhas
+from AGTurmas import gerar_instancia_sintetica
+
+
+PARAMETROS = {
+    'tamanho_populacao': 10,
+    'num_geracoes': 6,
+    'novos_individuos_por_geracao': 3,
+    'taxa_crossover': 150,
+    'periodos_sem_evolucao': 9,
+    'num_ilhas': 3,
+    'intervalo_migracao': 2
+}
+
+
+def test_ilha_encerrada_nao_bloqueia(monkeypatch):
+    executar_ilha = AGIlhas._executar_ilha
+
+    def ilha_que_morre(indice, *args):
+        if indice == 1:
+            os._exit(9)
+        executar_ilha(indice, *args)
+
+    # Os processos das ilhas herdam a função substituída (fork)
+    monkeypatch.setattr(AGIlhas, '_executar_ilha', ilha_que_morre)
+    turmas, salas, blocos = gerar_instancia_sintetica(num_turmas=100, semente=3)
+    modelo = ModeloIlhas(turmas, salas, blocos, PARAMETROS)
+    with pytest.raises(RuntimeError, match="ilha 1 encerrada com código 9"):
+        modelo.executar()
@@ -0,0 +1,24 @@
+import random
+
+from AGTurmas import AlocacaoTurmasAG, gerar_instancia_sintetica
+
+
+def test_fases_dos_workers_entram_nas_metricas():
+    random.seed(1)
+    turmas, salas, blocos = gerar_instancia_sintetica(num_turmas=300, semente=3)
+    ag = AlocacaoTurmasAG(turmas, salas, blocos, {
+        'tamanho_populacao': 10,
+        'num_geracoes': 3,
+        'novos_individuos_por_geracao': 4,
+        'taxa_crossover': 150,
+        'periodos_sem_evolucao': 9,
+        'workers': 2,
+        'instrumentacao': True
+    })
+    ag.executar()
+
+    resumo = ag.instrumentacao.resumo()
+    assert resumo['crossover']['chamadas'] == 12
+    assert resumo['mutacao']['chamadas'] == 12
+    assert sum(ag.instrumentacao.geracoes[-1][f'chamadas_mutacao_criterio_{i}']
+               for i in range(1, 6)) > 0
@@ -0,0 +1,52 @@
+import queue
+from collections import OrderedDict
+
+import pytest
+
+from AGServico import PARAMETROS_PADRAO, _executar_tarefa, _preparar_instancia
+from AGTurmas import gerar_instancia_sintetica
+
+
+PARAMETROS = dict(PARAMETROS_PADRAO, tamanho_populacao=20, num_geracoes=10, workers=1)
+
+
+@pytest.fixture(scope='module')
+def instancia():
+    return gerar_instancia_sintetica(num_turmas=300, semente=3)
+
+
+def _resolver(cache, turmas, salas, blocos):
+    tarefa = {'id': 1, 'chave': 'k', 'turmas': turmas, 'salas': salas, 'blocos': blocos,
+              'parametros': PARAMETROS, 'semente': 7}
+    base, estado, _ = _preparar_instancia(cache, tarefa, 4)
+    resposta = _executar_tarefa(base, tarefa, queue.Queue(), float('inf'))
+    return estado, resposta['alocacao'], resposta['resultado']['fitness_total']
+
+
+def _variantes(turmas):
+    alterada = [dict(t) for t in turmas]
+    alterada[10]['num_alunos'] += 5
+    extras = turmas + [dict(turmas[0], id='extra_1'), dict(turmas[1], id='extra_2')]
+    return {
+        'quente': [turmas],
+        'acrescimo': [turmas[:-5]],
+        'remocao': [extras],
+        'revertida': [turmas, alterada],
+        'reordenada': [turmas[::-1]]
+    }
+
+
+def test_mesmo_resultado_em_qualquer_caminho_do_cache(instancia):
+    turmas, salas, blocos = instancia
+    estado, alocacao, fitness = _resolver(OrderedDict(), turmas, salas, blocos)
+    assert estado == 'frio'
+
+    estados = set()
+    for nome, anteriores in _variantes(turmas).items():
+        cache = OrderedDict()
+        for turmas_anteriores in anteriores:
+            _resolver(cache, turmas_anteriores, salas, blocos)
+        estado, alocacao_cache, fitness_cache = _resolver(cache, turmas, salas, blocos)
+        estados.add(estado)
+        assert (alocacao_cache, fitness_cache) == (alocacao, fitness), nome
+    assert estados == {'quente', 'alterado', 'frio'}
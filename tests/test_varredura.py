@@ -0,0 +1,17 @@
+import pytest
+
+from AGTurmas import AlocacaoTurmasAG, gerar_instancia_sintetica
+from AGVarredura import varredura
+
+
+@pytest.mark.parametrize('espaco', [
+    {'selecao': ['torneio', 'xyz']},
+    {'tamanho_populacao': [20, 0]},
+    {'busca_local': ['elite', 'todos']}
+])
+def test_configuracao_invalida_falha_antes_de_executar(espaco, monkeypatch):
+    turmas, salas, blocos = gerar_instancia_sintetica(num_turmas=100, semente=3)
+    ag = AlocacaoTurmasAG(turmas, salas, blocos, {})
+    monkeypatch.setattr(AlocacaoTurmasAG, 'executar', lambda *args, **kwargs: pytest.fail())
+    with pytest.raises(ValueError, match="Configuração"):
+        varredura(ag, espaco, geracoes=9)